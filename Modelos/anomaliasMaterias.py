@@ -0,0 +1,195 @@
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utilidades'))
+from datasetPeriodos import DatasetPeriodos
+from catalogoMaterias import cargar_indice
+from particiones import cargar_categorias
+
+# Calificaciones que describen el desempeño de un alumno en una materia
+COLUMNAS_CALIFICACION = ['p1', 'p2', 'p3', 'pf']
+COLUMNAS_LECTURA = ['id_grupo', 'id_materia', 'matricula_hash', *COLUMNAS_CALIFICACION]
+# Código de categoría que trae cada fila en una exportación desnormalizada (obtenerCSV.py --desnormalizar)
+COLUMNA_CATEGORIA = 'categoria'
+
+
+def cargar_historial_materias(ruta_datos, indice=None, tipo_periodo=None, carrera=None, semestre=None):
+    """
+    Junta el historial completo de calificaciones (todos los periodos) con la materia de
+    referencia de cada registro: el id canónico si se da un índice, o el id_materia.
+    Las calificaciones fuera de 0-10 se convierten en NaN, como en primerModelo.ipynb.
+    Si la exportación está desnormalizada, cada registro lleva además su 'categoria'
+    (decodificada con 'categorias.csv') sin unir mapeo_materias.csv.
+
+    Args:
+        ruta_datos (str): Carpeta con las carpetas 'Periodo_<num>'.
+        indice (IndiceMaterias): Índice id_materia -> id_canonico (opcional).
+
+    Returns:
+        DataFrame con 'periodo', 'carrera', 'semestre', las columnas de COLUMNAS_LECTURA, 'materia_ref'
+        y, si la exportación está desnormalizada, 'categoria'.
+    """
+    dataset = DatasetPeriodos(ruta_datos, max_memoria_mb=0, columnas=[*COLUMNAS_LECTURA, COLUMNA_CATEGORIA])
+    partes = []
+    for periodo, id_carrera, sem, df in dataset.iterar(tipo_periodo, carrera, semestre):
+        if 'matricula_hash' not in df.columns or 'id_materia' not in df.columns:
+            print(f"ADVERTENCIA: La partición p{periodo}c{id_carrera}s{sem} no tiene 'matricula_hash' o 'id_materia'. Omitiendo.")
+            continue
+        partes.append(df.assign(periodo=periodo, carrera=id_carrera, semestre=sem))
+    if not partes:
+        return pd.DataFrame(columns=['periodo', 'carrera', 'semestre', *COLUMNAS_LECTURA, 'materia_ref'])
+
+    historial = pd.concat(partes, ignore_index=True)
+    for col in COLUMNAS_CALIFICACION:
+        historial[col] = pd.to_numeric(historial[col], errors='coerce').astype(np.float32)
+        historial.loc[(historial[col] < 0) | (historial[col] > 10), col] = np.nan
+    historial = historial.dropna(subset=COLUMNAS_CALIFICACION, how='all').reset_index(drop=True)
+    if COLUMNA_CATEGORIA in historial.columns:
+        # Las particiones sin la columna (exportadas sin desnormalizar) quedan como categoría desconocida (-1)
+        codigos = historial[COLUMNA_CATEGORIA].fillna(-1).to_numpy(dtype=np.int64, copy=True)
+        categorias = cargar_categorias(ruta_datos)
+        codigos[codigos >= len(categorias)] = -1
+        historial[COLUMNA_CATEGORIA] = pd.Categorical.from_codes(codigos, categories=categorias)
+
+    ids = historial['id_materia'].to_numpy(dtype=np.int64)
+    if indice is not None:
+        canonicos = indice.canonico(ids)
+        # Los id_materia que no están en el catálogo se quedan como su propia materia (ids negativos)
+        historial['materia_ref'] = np.where(canonicos >= 0, canonicos, -ids - 1)
+    else:
+        historial['materia_ref'] = ids
+    return historial
+
+
+def _ajustar_lote(lote, contamination, random_state):
+    """Ajusta un IsolationForest por materia del lote y puntúa todos sus registros."""
+    resultados = []
+    for filas, X in lote:
+        # Las calificaciones faltantes se imputan con la mediana de la materia
+        medianas = np.nanmedian(X, axis=0)
+        X = np.where(np.isnan(X), np.nan_to_num(medianas, nan=0.0), X)
+        iso_forest = IsolationForest(contamination=contamination, random_state=random_state)
+        iso_forest.fit(X)
+        puntaje = iso_forest.score_samples(X)
+        # Equivale a predict() == -1 sin volver a recorrer los árboles
+        resultados.append((filas, puntaje, puntaje < iso_forest.offset_))
+    return resultados
+
+
+def detectar_anomalias_por_materia(historial, contamination=0.03, min_registros=30, procesos=None, random_state=42):
+    """
+    Ajusta un IsolationForest por materia sobre todo su historial y puntúa cada registro
+    (alumno en un grupo) contra esa referencia. Los ajustes se reparten entre procesos.
+
+    Args:
+        historial (DataFrame): Salida de cargar_historial_materias.
+        contamination (float): Proporción estimada de anomalías por materia.
+        min_registros (int): Materias con menos registros no se evalúan (anomalia = NaN).
+
+    Returns:
+        El historial con 'puntaje' (menor = más anómalo) y 'anomalia' (1 anómalo, 0 normal).
+    """
+    historial = historial.copy()
+    puntajes = np.full(len(historial), np.nan)
+    anomalias = np.full(len(historial), np.nan)
+    historial['puntaje'] = puntajes
+    historial['anomalia'] = anomalias
+
+    X_total = historial[COLUMNAS_CALIFICACION].to_numpy(dtype=np.float32)
+    grupos = historial.groupby('materia_ref').indices
+    tareas = sorted((filas for filas in grupos.values() if len(filas) >= min_registros), key=len, reverse=True)
+    if not tareas:
+        print("ADVERTENCIA: Ninguna materia tiene suficientes registros para ajustar Isolation Forest.")
+        return historial
+
+    # Reparto por tamaño (de mayor a menor, en turnos) para equilibrar la carga entre procesos
+    num_lotes = min(len(tareas), 4 * (procesos or os.cpu_count() or 1))
+    lotes = [[(filas, X_total[filas]) for filas in tareas[i::num_lotes]] for i in range(num_lotes)]
+
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = [executor.submit(_ajustar_lote, lote, contamination, random_state) for lote in lotes]
+        for futuro in futuros:
+            for filas, puntaje, es_anomalia in futuro.result():
+                puntajes[filas] = puntaje
+                anomalias[filas] = es_anomalia
+    historial['puntaje'] = puntajes
+    historial['anomalia'] = anomalias
+    print(f"Isolation Forest ajustado para {len(tareas)} materias ({len(grupos) - len(tareas)} con menos de {min_registros} registros).")
+    return historial
+
+
+def resumir_grupos(registros, umbral_z=3.0, caida_minima=1.5, min_alumnos=5):
+    """
+    Resume las anomalías por grupo y compara cada grupo con los demás grupos de la misma
+    materia a lo largo de su historial. Un grupo colapsa cuando el puntaje medio de sus
+    alumnos queda `umbral_z` desviaciones robustas (mediana/MAD) por debajo del de los
+    grupos de la materia y su promedio final está al menos `caida_minima` puntos debajo de
+    la mediana histórica: se señala al grupo completo que reprobó, no al único alumno que
+    aprobó.
+
+    Returns:
+        DataFrame por (periodo, carrera, semestre, id_grupo, materia_ref) con 'num_alumnos',
+        'tasa_anomalia', 'puntaje_medio', 'z_grupo', 'promedio_grupo', 'mediana_materia' y 'colapso'
+        (más 'categoria' si los registros la traen).
+    """
+    evaluados = registros.dropna(subset=['anomalia'])
+    claves = ['periodo', 'carrera', 'semestre', 'id_grupo', 'materia_ref']
+    agregaciones = {
+        'num_alumnos': ('matricula_hash', 'nunique'),
+        'tasa_anomalia': ('anomalia', 'mean'),
+        'puntaje_medio': ('puntaje', 'mean'),
+        'promedio_grupo': ('pf', 'mean'),
+    }
+    if COLUMNA_CATEGORIA in evaluados.columns:
+        agregaciones[COLUMNA_CATEGORIA] = (COLUMNA_CATEGORIA, 'first')
+    grupos = evaluados.groupby(claves).agg(**agregaciones).reset_index()
+
+    por_materia = grupos.groupby('materia_ref')['puntaje_medio']
+    mediana = por_materia.transform('median')
+    mad = (grupos['puntaje_medio'] - mediana).abs().groupby(grupos['materia_ref']).transform('median')
+    grupos['z_grupo'] = (grupos['puntaje_medio'] - mediana) / (1.4826 * mad).replace(0, np.nan)
+    grupos['mediana_materia'] = grupos['materia_ref'].map(evaluados.groupby('materia_ref')['pf'].median())
+    grupos['colapso'] = (
+        (grupos['z_grupo'] <= -umbral_z)
+        & (grupos['num_alumnos'] >= min_alumnos)
+        & (grupos['promedio_grupo'] <= grupos['mediana_materia'] - caida_minima)
+    )
+    return grupos
+
+
+def tasas_por_periodo_carrera(registros):
+    """Proporción de registros anómalos por periodo y carrera (para reportes)."""
+    evaluados = registros.dropna(subset=['anomalia'])
+    return evaluados.groupby(['periodo', 'carrera']).agg(
+        num_registros=('anomalia', 'size'),
+        tasa_anomalia=('anomalia', 'mean'),
+    ).reset_index()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Detección de anomalías relativa a cada materia (un Isolation Forest por materia).")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's")
+    parser.add_argument('--catalogo', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'materias y graduados'),
+                        help="Carpeta con indice_materias.csv y catalogo_materias.csv (materias canónicas).")
+    parser.add_argument('--por-id-materia', action='store_true', help="Ajustar por id_materia en lugar de por materia canónica.")
+    parser.add_argument('--contaminacion', type=float, default=0.03)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--salida', default='anomalias_grupos.csv')
+    parser.add_argument('--salida-tasas', default='anomalias_tasas.csv', help="Tasas por periodo y carrera (entrada de reportes.py).")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.datos):
+        print(f"❌ ERROR: El directorio especificado '{args.datos}' no existe.")
+    else:
+        indice = None if args.por_id_materia else cargar_indice(args.catalogo)
+        historial = cargar_historial_materias(args.datos, indice)
+        registros = detectar_anomalias_por_materia(historial, args.contaminacion, procesos=args.procesos)
+        grupos = resumir_grupos(registros)
+        grupos.to_csv(args.salida, index=False, encoding='utf-8')
+        tasas_por_periodo_carrera(registros).to_csv(args.salida_tasas, index=False, encoding='utf-8')
+        print(f"{len(grupos)} grupos evaluados, {int(grupos['colapso'].sum())} con colapso. Resumen guardado en '{args.salida}'.")
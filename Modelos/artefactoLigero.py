@@ -0,0 +1,209 @@
+import os
+import json
+import numpy as np
+
+# Solo NumPy al importar: puntuar con un artefacto no debe cargar pandas, sklearn ni xgboost
+UMBRAL_VERDE = 0.70
+UMBRAL_AMARILLO = 0.40
+SEMAFOROS = np.array(['Rojo', 'Amarillo', 'Verde'])
+
+
+def asignar_semaforo(probabilidades):
+    """Versión vectorizada de los umbrales de predecir_semaforo."""
+    probabilidades = np.asarray(probabilidades)
+    indices = (probabilidades >= UMBRAL_AMARILLO).astype(np.int8) + (probabilidades >= UMBRAL_VERDE)
+    return SEMAFOROS[indices]
+
+
+def filas_alumnos(alumnos, columnas):
+    """
+    Convierte una lista de diccionarios de alumno en una matriz con las características en el
+    orden de `columnas`. No se rellenan campos: a cada alumno le deben sobrar y faltar cero
+    campos y todos sus valores deben ser numéricos. Lo usan servicioSemaforo (cuerpo de la
+    petición) y tesis.py score --alumno, así que ambos aceptan y rechazan lo mismo.
+
+    Args:
+        alumnos (list): Diccionarios {característica: valor}.
+        columnas (list): Orden de las características (metadatos['columnas'] del artefacto).
+
+    Returns:
+        ndarray float64 de forma (len(alumnos), len(columnas)).
+    """
+    filas = np.empty((len(alumnos), len(columnas)), dtype=np.float64)
+    for i, alumno in enumerate(alumnos):
+        prefijo = f"Alumno {i}: " if len(alumnos) > 1 else ''
+        if not isinstance(alumno, dict):
+            raise ValueError(f"{prefijo}Se esperaba un objeto JSON con las características del alumno.")
+        faltantes = [c for c in columnas if c not in alumno]
+        if faltantes:
+            raise ValueError(f"{prefijo}Faltan campos: {', '.join(faltantes)}")
+        desconocidos = [c for c in alumno if c not in columnas]
+        if desconocidos:
+            raise ValueError(f"{prefijo}Campos desconocidos: {', '.join(desconocidos)} (se esperan: {', '.join(columnas)})")
+        try:
+            filas[i] = [float(alumno[c]) for c in columnas]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{prefijo}Datos de alumno inválidos: {e}")
+    return filas
+
+
+class EscaladorLigero:
+    """Equivalente de StandardScaler.transform con la media y la escala guardadas."""
+
+    def __init__(self, media, escala):
+        self.media = np.asarray(media, dtype=np.float64)
+        self.escala = np.asarray(escala, dtype=np.float64)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.media) / self.escala
+
+
+class ArbolesNumpy:
+    """
+    Evalúa con NumPy un modelo binary:logistic guardado en el JSON nativo de XGBoost
+    (Booster.save_model). Todos los árboles avanzan a la vez, un nivel por iteración, así que
+    el costo es de max_depth pasos vectorizados por bloque de filas.
+
+    Args:
+        ruta_modelo (str): 'modelo.json' del artefacto.
+        tam_bloque (int): Filas evaluadas a la vez (acota la memoria de nodos filas x árboles).
+    """
+
+    def __init__(self, ruta_modelo, tam_bloque=10000):
+        with open(ruta_modelo, encoding='utf-8') as f:
+            learner = json.load(f)['learner']
+        objetivo = learner['objective']['name']
+        booster = learner['gradient_booster']
+        if objetivo != 'binary:logistic' or booster['name'] != 'gbtree':
+            raise ValueError(f"Solo se evalúan modelos gbtree con binary:logistic (el modelo es {booster['name']}, {objetivo}).")
+        # XGBoost 3 guarda base_score como vector ('[5E-1]'); las versiones anteriores como escalar
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]').split(',')[0])
+        self.margen_base = np.log(base_score / (1 - base_score))
+        self.tam_bloque = tam_bloque
+
+        # Los nodos de todos los árboles van en arreglos planos; una hoja apunta a sí misma, así
+        # que basta con avanzar max_depth veces sin revisar qué filas ya llegaron a su hoja
+        arboles = booster['model']['trees']
+        tamanos = np.array([len(a['left_children']) for a in arboles], dtype=np.int64)
+        self.raices = np.concatenate([[0], np.cumsum(tamanos)[:-1]]).astype(np.int64)
+        izquierdo, derecho = [], []
+        for raiz, arbol in zip(self.raices, arboles):
+            propio = np.arange(len(arbol['left_children']), dtype=np.int64)
+            hijos_izq = np.asarray(arbol['left_children'], dtype=np.int64)
+            hijos_der = np.asarray(arbol['right_children'], dtype=np.int64)
+            izquierdo.append(raiz + np.where(hijos_izq == -1, propio, hijos_izq))
+            derecho.append(raiz + np.where(hijos_der == -1, propio, hijos_der))
+        self.izquierdo = np.concatenate(izquierdo)
+        self.derecho = np.concatenate(derecho)
+        self.columna = np.concatenate([a['split_indices'] for a in arboles]).astype(np.int64)
+        # En los nodos hoja, split_conditions guarda el valor de la hoja
+        self.umbral = np.concatenate([a['split_conditions'] for a in arboles]).astype(np.float32)
+        self.defecto_izquierdo = np.concatenate([a['default_left'] for a in arboles]).astype(bool)
+        self.profundidad = self._profundidad_maxima()
+
+    def _profundidad_maxima(self):
+        nodo, profundidad = self.raices, 0
+        while True:
+            internos = nodo[self.izquierdo[nodo] != nodo]
+            if not len(internos):
+                return profundidad
+            nodo, profundidad = np.concatenate([self.izquierdo[internos], self.derecho[internos]]), profundidad + 1
+
+    def _margen(self, X):
+        X = np.ascontiguousarray(X)
+        inicio_fila = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        valores_X = X.ravel()
+        nodo = np.repeat(self.raices[None, :], len(X), axis=0)
+        for _ in range(self.profundidad):
+            valores = valores_X.take(inicio_fila + self.columna.take(nodo))
+            a_la_izquierda = np.where(np.isnan(valores), self.defecto_izquierdo.take(nodo), valores < self.umbral.take(nodo))
+            nodo = np.where(a_la_izquierda, self.izquierdo.take(nodo), self.derecho.take(nodo))
+        return self.margen_base + self.umbral.take(nodo).sum(axis=1, dtype=np.float64)
+
+    def predict_proba(self, X):
+        # XGBoost compara las características en float32
+        X = np.asarray(X, dtype=np.float32)
+        margen = np.empty(len(X), dtype=np.float64)
+        for inicio in range(0, len(X), self.tam_bloque):
+            margen[inicio:inicio + self.tam_bloque] = self._margen(X[inicio:inicio + self.tam_bloque])
+        positiva = 1 / (1 + np.exp(-margen))
+        return np.column_stack([1 - positiva, positiva])
+
+
+class ModeloLineal:
+    """predict_proba de un SGDClassifier o LogisticRegression a partir de sus coeficientes."""
+
+    def __init__(self, coeficientes, intercepto, perdida='log_loss'):
+        self.coeficientes = np.asarray(coeficientes, dtype=np.float64).ravel()
+        self.intercepto = float(np.asarray(intercepto).ravel()[0])
+        self.perdida = perdida
+
+    def predict_proba(self, X):
+        decision = np.asarray(X, dtype=np.float64) @ self.coeficientes + self.intercepto
+        if self.perdida == 'modified_huber':
+            # Misma fórmula que SGDClassifier.predict_proba con modified_huber
+            positiva = (np.clip(decision, -1, 1) + 1) / 2
+        else:
+            positiva = 1 / (1 + np.exp(-decision))
+        return np.column_stack([1 - positiva, positiva])
+
+
+def exportar_artefacto(model, scaler, carpeta, columnas=None):
+    """
+    Guarda un modelo entrenado como artefacto ligero, que se puede puntuar solo con NumPy:
+    'escalador.npz' (media y escala del StandardScaler), 'modelo.json' (XGBoost, en su formato
+    nativo) o 'lineal.npz' (coeficientes de SGDClassifier/LogisticRegression) y 'artefacto.json'.
+
+    Args:
+        model: XGBClassifier, SGDClassifier o LogisticRegression entrenado.
+        scaler (StandardScaler): Escalador del entrenamiento.
+        carpeta (str): Carpeta del artefacto.
+        columnas (list): Orden de las características (se guarda para validar la entrada).
+
+    Returns:
+        dict: Metadatos del artefacto.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    np.savez(os.path.join(carpeta, 'escalador.npz'), media=scaler.mean_, escala=scaler.scale_)
+    if hasattr(model, 'get_booster'):
+        model.get_booster().save_model(os.path.join(carpeta, 'modelo.json'))
+        metadatos = {'tipo': 'xgboost'}
+    elif hasattr(model, 'coef_'):
+        perdida = getattr(model, 'loss', 'log_loss')
+        if perdida not in ('log_loss', 'modified_huber'):
+            raise ValueError(f"La pérdida '{perdida}' no tiene predict_proba; no se puede exportar como artefacto ligero.")
+        np.savez(os.path.join(carpeta, 'lineal.npz'), coeficientes=model.coef_, intercepto=model.intercept_)
+        metadatos = {'tipo': 'lineal', 'perdida': perdida}
+    else:
+        raise ValueError(f"El modelo {type(model).__name__} no se puede exportar como artefacto ligero; usa el .pkl con joblib.")
+    metadatos['columnas'] = list(columnas) if columnas is not None else None
+    with open(os.path.join(carpeta, 'artefacto.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, indent=2, ensure_ascii=False)
+    return metadatos
+
+
+def cargar_artefacto(carpeta, motor='numpy'):
+    """
+    Carga un artefacto de exportar_artefacto.
+
+    Args:
+        carpeta (str): Carpeta del artefacto.
+        motor (str): 'numpy' (ArbolesNumpy) o 'xgboost' (el Booster de xgboost, que tarda más en importarse).
+
+    Returns:
+        (model, scaler, metadatos): model con predict_proba y scaler con transform, intercambiables
+        con los de joblib en semaforoLotes.puntuar_por_bloques.
+    """
+    with open(os.path.join(carpeta, 'artefacto.json'), encoding='utf-8') as f:
+        metadatos = json.load(f)
+    escalador = np.load(os.path.join(carpeta, 'escalador.npz'))
+    scaler = EscaladorLigero(escalador['media'], escalador['escala'])
+    if metadatos['tipo'] == 'lineal':
+        lineal = np.load(os.path.join(carpeta, 'lineal.npz'))
+        return ModeloLineal(lineal['coeficientes'], lineal['intercepto'], metadatos['perdida']), scaler, metadatos
+    if motor == 'xgboost':
+        from xgboost import XGBClassifier
+        model = XGBClassifier()
+        model.load_model(os.path.join(carpeta, 'modelo.json'))
+        return model, scaler, metadatos
+    return ArbolesNumpy(os.path.join(carpeta, 'modelo.json')), scaler, metadatos
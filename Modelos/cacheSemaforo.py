@@ -0,0 +1,93 @@
+import sqlite3
+import hashlib
+import time
+import pandas as pd
+import numpy as np
+
+
+def version_artefacto(*rutas):
+    """
+    Calcula la versión de un artefacto de modelo como el SHA-256 (abreviado) del
+    contenido de sus archivos (por ejemplo, modelo y escalador). Reentrenar el
+    modelo cambia la versión y con ello invalida las predicciones guardadas.
+    """
+    sha = hashlib.sha256()
+    for ruta in rutas:
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloque)
+    return sha.hexdigest()[:16]
+
+
+def hash_instantaneas(instantaneas):
+    """
+    Devuelve un hash de 64 bits por fila con el contenido de la instantánea.
+    Cualquier calificación nueva del alumno cambia sus promedios y por lo tanto su hash.
+    """
+    valores = instantaneas.astype(np.float64).round(9)
+    return pd.util.hash_pandas_object(valores, index=False).to_numpy().view(np.int64)
+
+
+class CacheSemaforo:
+    """
+    Caché persistente (SQLite) de predicciones del semáforo.
+
+    Cada entrada se identifica por (matricula_hash, version_modelo) y guarda el hash
+    de la instantánea con la que se calculó; si el hash cambia, la entrada deja de
+    ser válida y se reemplaza en la siguiente puntuación.
+
+    Args:
+        ruta_bd (str): Archivo SQLite de la caché (se crea si no existe).
+        version_modelo (str): Versión del artefacto (ver version_artefacto).
+    """
+
+    def __init__(self, ruta_bd, version_modelo):
+        self.version_modelo = version_modelo
+        self.conn = sqlite3.connect(ruta_bd)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS predicciones (
+                matricula_hash TEXT NOT NULL,
+                version_modelo TEXT NOT NULL,
+                hash_instantanea INTEGER NOT NULL,
+                probabilidad REAL NOT NULL,
+                actualizado REAL NOT NULL,
+                PRIMARY KEY (matricula_hash, version_modelo)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def consultar(self, matriculas, hashes):
+        """
+        Busca las predicciones vigentes.
+
+        Returns:
+            np.ndarray con la probabilidad guardada de cada alumno, o NaN si no hay
+            una entrada con la misma versión de modelo y el mismo hash de instantánea.
+        """
+        guardadas = pd.read_sql_query(
+            "SELECT matricula_hash, hash_instantanea, probabilidad FROM predicciones WHERE version_modelo = ?;",
+            self.conn, params=(self.version_modelo,)
+        )
+        consulta = pd.DataFrame({'matricula_hash': np.asarray(matriculas), 'hash_instantanea': np.asarray(hashes)})
+        encontradas = consulta.merge(guardadas, on=['matricula_hash', 'hash_instantanea'], how='left')
+        return encontradas['probabilidad'].to_numpy(dtype=np.float64)
+
+    def guardar(self, matriculas, hashes, probabilidades):
+        """Inserta o reemplaza las predicciones de los alumnos indicados."""
+        ahora = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO predicciones VALUES (?, ?, ?, ?, ?);",
+            ((str(m), self.version_modelo, int(h), float(p), ahora) for m, h, p in zip(matriculas, hashes, probabilidades))
+        )
+        self.conn.commit()
+
+    def purgar_versiones_antiguas(self):
+        """Elimina las entradas de versiones de modelo distintas a la actual."""
+        cursor = self.conn.execute("DELETE FROM predicciones WHERE version_modelo <> ?;", (self.version_modelo,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def cerrar(self):
+        self.conn.close()
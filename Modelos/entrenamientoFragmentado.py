@@ -0,0 +1,329 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import importlib
+import numpy as np
+import pandas as pd
+import joblib
+import warnings
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import confusion_matrix, roc_auc_score
+
+from semaforoLotes import leer_particion, COLUMNAS_CARACTERISTICAS
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utilidades'))
+from particiones import listar_particiones
+from instrumentacion import etapa
+from calendario import cargar_calendario
+
+warnings.filterwarnings('ignore')
+
+# Columnas de la matriz guardada en disco: las características en el orden de entrenamiento y la etiqueta
+COLUMNAS_MATRIZ = [*COLUMNAS_CARACTERISTICAS, 'resultado_final']
+MODELOS = ['xgboost', 'sgd_logistica', 'sgd_svm']
+# Mismos hiperparámetros que XGBoost.py, para la API de bajo nivel de xgboost
+PARAMETROS_XGBOOST = {'objective': 'binary:logistic', 'eval_metric': 'logloss', 'learning_rate': 0.1,
+                      'max_depth': 5, 'tree_method': 'hist', 'seed': 42}
+NUM_ARBOLES = 150
+
+
+class MatrizInstantaneas:
+    """
+    Matriz de instantáneas (float32, una fila por instantánea) guardada en disco y leída con
+    np.memmap, de modo que solo los bloques que se procesan ocupan memoria.
+    Se compone de '<ruta>.f32' (datos) y '<ruta>.json' (columnas y número de filas).
+    """
+
+    def __init__(self, ruta, columnas=COLUMNAS_MATRIZ):
+        self.ruta = ruta
+        self.columnas = list(columnas)
+        self.num_filas = 0
+        self._archivo = None
+
+    @classmethod
+    def abrir(cls, ruta):
+        with open(ruta + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        matriz = cls(ruta, meta['columnas'])
+        matriz.num_filas = meta['num_filas']
+        return matriz
+
+    def agregar(self, df):
+        """Agrega al final las filas de un DataFrame con las columnas de la matriz."""
+        if self._archivo is None:
+            self._archivo = open(self.ruta + '.f32', 'wb')
+        bloque = df[self.columnas].to_numpy(dtype=np.float32)
+        self._archivo.write(np.ascontiguousarray(bloque).tobytes())
+        self.num_filas += len(bloque)
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        with open(self.ruta + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'columnas': self.columnas, 'num_filas': self.num_filas}, f, indent=2)
+
+    def datos(self):
+        """Vista de solo lectura de la matriz completa (no se carga en memoria)."""
+        return np.memmap(self.ruta + '.f32', dtype=np.float32, mode='r', shape=(self.num_filas, len(self.columnas)))
+
+    def etiquetas(self):
+        return np.asarray(self.datos()[:, -1], dtype=np.int8)
+
+    def bloques(self, filas=None, tam_bloque=100000):
+        """
+        Genera (X, y) por bloques de filas consecutivas (o de las `filas` indicadas, en orden).
+        Cada bloque se copia del memmap, así que la memoria queda acotada por tam_bloque.
+        """
+        datos = self.datos()
+        total = self.num_filas if filas is None else len(filas)
+        for inicio in range(0, total, tam_bloque):
+            if filas is None:
+                bloque = np.asarray(datos[inicio:inicio + tam_bloque], dtype=np.float64)
+            else:
+                bloque = np.asarray(datos[filas[inicio:inicio + tam_bloque]], dtype=np.float64)
+            yield bloque[:, :-1], bloque[:, -1].astype(np.int8)
+
+
+def repartir_en_cubetas(ruta_datos, carpeta_cubetas, num_cubetas=16):
+    """
+    Reparte en una sola pasada las calificaciones de cada partición en `num_cubetas` CSV
+    temporales según el hash de la matrícula: todas las filas de un alumno (de todas sus
+    carreras) caen en la misma cubeta.
+
+    Returns:
+        list con la ruta de cada cubeta (None si quedó vacía).
+    """
+    shutil.rmtree(carpeta_cubetas, ignore_errors=True)
+    os.makedirs(carpeta_cubetas)
+    rutas_cubetas = [os.path.join(carpeta_cubetas, f"cubeta_{i:03d}.csv") for i in range(num_cubetas)]
+    escritas = [False] * num_cubetas
+
+    with etapa('matriz_cubetas', cubetas=num_cubetas) as registro:
+        filas = 0
+        for p in listar_particiones(ruta_datos, omitir_invalidas=True).itertuples():
+            df = leer_particion(p.ruta, p.periodo, p.carrera, p.semestre)
+            if df is None:
+                continue
+            cubeta = df['matricula_hash'].str[:8].apply(int, base=16) % num_cubetas
+            for i, parte in df.groupby(cubeta):
+                parte.to_csv(rutas_cubetas[i], mode='a', header=not escritas[i], index=False)
+                escritas[i] = True
+            filas += len(df)
+        registro['filas'] = filas
+    print(f"{filas} calificaciones repartidas en {num_cubetas} cubetas.")
+    return [ruta if escrita else None for ruta, escrita in zip(rutas_cubetas, escritas)]
+
+
+def instantaneas_cubeta(ruta_cubeta, graduados, modulo_instantaneas, period_order, period_order_name):
+    """Instantáneas de los alumnos de una cubeta, con las columnas de la matriz."""
+    crear_dataset_snapshots = importlib.import_module(modulo_instantaneas).crear_dataset_snapshots
+    instantaneas = crear_dataset_snapshots(pd.read_csv(ruta_cubeta), graduados, period_order, period_order_name)
+    return instantaneas.reindex(columns=COLUMNAS_MATRIZ, fill_value=0)
+
+
+def construir_matriz(ruta_datos, archivo_graduados, ruta_matriz, modulo_instantaneas='XGBoost', num_cubetas=16,
+                     period_order=None, period_order_name=None):
+    """
+    Construye la matriz de instantáneas sin juntar todo el historial en memoria: reparte las
+    calificaciones en cubetas por hash de matrícula (repartir_en_cubetas) y luego crea las
+    instantáneas de cada cubeta con crear_dataset_snapshots del script de modelo.
+
+    Args:
+        modulo_instantaneas (str): Script de Modelos/ cuyo crear_dataset_snapshots se usa.
+        num_cubetas (int): Más cubetas = menos memoria por cubeta.
+        period_order, period_order_name (list): Calendario de periodos (por defecto, el del árbol).
+
+    Returns:
+        MatrizInstantaneas cerrada.
+    """
+    if period_order is None:
+        calendario = cargar_calendario(ruta_datos)
+        period_order, period_order_name = calendario.period_order, calendario.period_order_name
+    with open(archivo_graduados, 'r') as f:
+        graduados = set(line.strip() for line in f)
+
+    carpeta_cubetas = ruta_matriz + '_cubetas'
+    rutas_cubetas = repartir_en_cubetas(ruta_datos, carpeta_cubetas, num_cubetas)
+
+    matriz = MatrizInstantaneas(ruta_matriz)
+    with etapa('matriz_instantaneas') as registro:
+        for ruta in rutas_cubetas:
+            if ruta is None:
+                continue
+            instantaneas = instantaneas_cubeta(ruta, graduados, modulo_instantaneas, period_order, period_order_name)
+            if not instantaneas.empty:
+                matriz.agregar(instantaneas)
+        matriz.cerrar()
+        registro['filas'] = matriz.num_filas
+    shutil.rmtree(carpeta_cubetas, ignore_errors=True)
+    print(f"Matriz de {matriz.num_filas} instantáneas guardada en '{ruta_matriz}.f32'.")
+    return matriz
+
+
+def ajustar_escalador(matriz, filas=None, tam_bloque=100000):
+    """StandardScaler ajustado por bloques con partial_fit (mismo resultado que fit sobre todo)."""
+    scaler = StandardScaler()
+    for X, _ in matriz.bloques(filas, tam_bloque):
+        scaler.partial_fit(X)
+    return scaler
+
+
+def _iterador_xgboost(matriz, filas, scaler, tam_bloque, cache_prefix):
+    """DataIter de xgboost que entrega la matriz escalada bloque por bloque."""
+    import xgboost as xgb
+
+    class IteradorInstantaneas(xgb.DataIter):
+        def __init__(self):
+            self._bloques = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data):
+            if self._bloques is None:
+                self._bloques = matriz.bloques(filas, tam_bloque)
+            bloque = next(self._bloques, None)
+            if bloque is None:
+                return False
+            X, y = bloque
+            input_data(data=scaler.transform(X), label=y)
+            return True
+
+        def reset(self):
+            self._bloques = None
+
+    return IteradorInstantaneas()
+
+
+def entrenar_xgboost(matriz, filas, scaler, tam_bloque=100000, carpeta_cache='cache_xgboost'):
+    """
+    Entrena XGBoost en memoria externa: xgboost recorre la matriz con el iterador y guarda
+    las páginas cuantizadas en `carpeta_cache`, no en RAM.
+
+    Returns:
+        XGBClassifier (compatible con predict_proba, semaforoLotes y explicacionSemaforo).
+    """
+    import xgboost as xgb
+    from xgboost import XGBClassifier
+
+    os.makedirs(carpeta_cache, exist_ok=True)
+    iterador = _iterador_xgboost(matriz, filas, scaler, tam_bloque, os.path.join(carpeta_cache, 'instantaneas'))
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        dtrain = xgb.ExtMemQuantileDMatrix(iterador)
+    else:
+        dtrain = xgb.DMatrix(iterador)
+    booster = xgb.train(PARAMETROS_XGBOOST, dtrain, num_boost_round=NUM_ARBOLES)
+    del dtrain
+
+    model = XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('json')))
+    return model
+
+
+def entrenar_sgd(matriz, filas, scaler, perdida='log_loss', epocas=5, tam_bloque=100000, alpha=1e-3, random_state=42):
+    """
+    Línea base lineal con SGDClassifier.partial_fit, varias pasadas sobre los bloques.
+    'log_loss' equivale a una regresión logística; 'modified_huber' a un SVM lineal con
+    predict_proba (la versión fuera de memoria del SVC de SVC.py).
+    """
+    model = SGDClassifier(loss=perdida, alpha=alpha, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    filas = np.arange(matriz.num_filas) if filas is None else np.asarray(filas)
+    for epoca in range(epocas):
+        # Orden de bloques aleatorio en cada época. Cada bloque se lee en orden (lectura secuencial
+        # del memmap) y se baraja ya en memoria: partial_fit no baraja y las instantáneas de un
+        # mismo alumno están juntas
+        inicios = rng.permutation(np.arange(0, len(filas), tam_bloque))
+        for inicio in inicios:
+            for X, y in matriz.bloques(filas[inicio:inicio + tam_bloque], tam_bloque):
+                orden = rng.permutation(len(y))
+                model.partial_fit(scaler.transform(X[orden]), y[orden], classes=np.array([0, 1]))
+    return model
+
+
+def predecir_por_bloques(matriz, filas, model, scaler, tam_bloque=100000):
+    probabilidades = np.empty(len(filas) if filas is not None else matriz.num_filas, dtype=np.float64)
+    inicio = 0
+    for X, _ in matriz.bloques(filas, tam_bloque):
+        probabilidades[inicio:inicio + len(X)] = model.predict_proba(scaler.transform(X))[:, 1]
+        inicio += len(X)
+    return probabilidades
+
+
+def entrenar(matriz, filas, modelo, tam_bloque, epocas=5, carpeta_cache='cache_xgboost'):
+    scaler = ajustar_escalador(matriz, filas, tam_bloque)
+    if modelo == 'xgboost':
+        return entrenar_xgboost(matriz, filas, scaler, tam_bloque, carpeta_cache), scaler
+    perdida = 'log_loss' if modelo == 'sgd_logistica' else 'modified_huber'
+    return entrenar_sgd(matriz, filas, scaler, perdida, epocas, tam_bloque), scaler
+
+
+def entrenar_modelo_fragmentado(matriz, modelo='xgboost', num_splits=5, tam_bloque=100000, epocas=5, carpeta_cache='cache_xgboost'):
+    """
+    Equivalente fuera de memoria de entrenar_modelo_con_kfolds: validación cruzada
+    estratificada y modelo final, leyendo la matriz solo por bloques de `tam_bloque` filas.
+    En memoria solo quedan las etiquetas y las probabilidades de validación (un número por fila).
+
+    Returns:
+        (model, scaler) del modelo final, también guardados con joblib.
+    """
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo desconocido: '{modelo}' (opciones: {', '.join(MODELOS)}).")
+    print(f"\n--- Iniciando Entrenamiento Fragmentado ({modelo}, bloques de {tam_bloque} filas) con K-Folds ---")
+    y = matriz.etiquetas()
+    kf = StratifiedKFold(n_splits=num_splits, shuffle=True, random_state=42)
+
+    auc_scores = []
+    total_conf_matrix = np.zeros((2, 2))
+    for fold, (train_idx, val_idx) in enumerate(kf.split(np.zeros(len(y)), y)):
+        print(f"Procesando Fold {fold + 1}/{num_splits}...")
+        with etapa('fold_fragmentado', fold=fold + 1, modelo=modelo, filas=len(train_idx)):
+            model, scaler = entrenar(matriz, train_idx, modelo, tam_bloque, epocas, carpeta_cache)
+            probas = predecir_por_bloques(matriz, val_idx, model, scaler, tam_bloque)
+            auc_scores.append(roc_auc_score(y[val_idx], probas))
+            total_conf_matrix += confusion_matrix(y[val_idx], (probas >= 0.5).astype(int), labels=[0, 1])
+
+    print(f"\n--- Resultados de la Validación Cruzada ({modelo}) ---")
+    print(f"AUC Score Promedio: {np.mean(auc_scores):.4f} (Desv. Estándar: {np.std(auc_scores):.4f})")
+    print("\nMatriz de Confusión Acumulada (Total de todas las validaciones):")
+    print("                 Predicción: Desertor | Predicción: Graduado")
+    print(f"Real: Desertor        {int(total_conf_matrix[0, 0]):<15} | {int(total_conf_matrix[0, 1]):<15}")
+    print(f"Real: Graduado        {int(total_conf_matrix[1, 0]):<15} | {int(total_conf_matrix[1, 1]):<15}")
+
+    print("\nEntrenando modelo final con todos los datos...")
+    with etapa('modelo_final_fragmentado', modelo=modelo, filas=matriz.num_filas):
+        model, scaler = entrenar(matriz, None, modelo, tam_bloque, epocas, carpeta_cache)
+    joblib.dump(model, f'modelo_{modelo}_fragmentado.pkl')
+    joblib.dump(scaler, f'scaler_{modelo}_fragmentado.pkl')
+    print("Modelo y escalador finales guardados.")
+    shutil.rmtree(carpeta_cache, ignore_errors=True)
+    return model, scaler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Entrenamiento por bloques (fuera de memoria) sobre una matriz de instantáneas en disco.")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's")
+    parser.add_argument('--graduados', default='./graduados.txt')
+    parser.add_argument('--matriz', default='instantaneas', help="Ruta base de la matriz ('<ruta>.f32' y '<ruta>.json').")
+    parser.add_argument('--reconstruir', action='store_true', help="Volver a construir la matriz aunque ya exista.")
+    parser.add_argument('--cubetas', type=int, default=16)
+    parser.add_argument('--modelo', choices=MODELOS, default='xgboost')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--bloque', type=int, default=100000, help="Filas por bloque; acota la memoria del entrenamiento.")
+    parser.add_argument('--epocas', type=int, default=5, help="Pasadas de partial_fit para los modelos SGD.")
+    args = parser.parse_args()
+
+    try:
+        if args.reconstruir or not os.path.exists(args.matriz + '.json'):
+            calendario = cargar_calendario(args.datos)
+            matriz = construir_matriz(args.datos, args.graduados, args.matriz, num_cubetas=args.cubetas,
+                                      period_order=calendario.period_order, period_order_name=calendario.period_order_name)
+        else:
+            matriz = MatrizInstantaneas.abrir(args.matriz)
+            print(f"Usando la matriz existente '{args.matriz}' ({matriz.num_filas} instantáneas).")
+        entrenar_modelo_fragmentado(matriz, args.modelo, args.folds, args.bloque, args.epocas)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}")
@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+from scipy import sparse
+import warnings
+
+warnings.filterwarnings('ignore')
+
+
+def _matriz_aportes_arboles(model, num_caracteristicas):
+    """
+    Construye una matriz dispersa (nodos x características) con lo que aporta cada nodo
+    a la probabilidad de graduarse: la diferencia entre la probabilidad del nodo y la
+    de su padre, asignada a la característica con la que se dividió el padre.
+    Los nodos de todos los árboles del bosque se apilan en el mismo orden que usa
+    decision_path.
+
+    Returns:
+        (matriz dispersa de aportes, vector con la probabilidad de la raíz de cada árbol)
+    """
+    estimadores = model.estimators_ if hasattr(model, 'estimators_') else [model]
+    bloques = []
+    raices = []
+    for estimador in estimadores:
+        arbol = estimador.tree_
+        valores = arbol.value[:, 0, :]
+        prob_graduarse = valores[:, 1] / valores.sum(axis=1)
+
+        padres = np.full(arbol.node_count, -1)
+        for hijos in (arbol.children_left, arbol.children_right):
+            internos = np.flatnonzero(hijos >= 0)
+            padres[hijos[internos]] = internos
+        nodos = np.flatnonzero(padres >= 0)
+
+        bloques.append(sparse.csr_matrix(
+            (prob_graduarse[nodos] - prob_graduarse[padres[nodos]], (nodos, arbol.feature[padres[nodos]])),
+            shape=(arbol.node_count, num_caracteristicas)
+        ))
+        raices.append(prob_graduarse[0])
+    return sparse.vstack(bloques).tocsr(), np.array(raices)
+
+
+def contribuciones_arboles(model, X_scaled, matriz_aportes=None):
+    """
+    Aportes por característica de un RandomForest (o un árbol de decisión) de scikit-learn
+    sobre la probabilidad de graduarse. Recorre el camino de decisión de todas las filas
+    de una sola vez y suma los aportes con un producto de matrices dispersas.
+
+    Returns:
+        (aportes [n x características], sesgo [n]); aportes.sum(1) + sesgo == predict_proba[:, 1]
+    """
+    if matriz_aportes is None:
+        matriz_aportes = _matriz_aportes_arboles(model, X_scaled.shape[1])
+    aportes_nodos, raices = matriz_aportes
+    caminos = model.decision_path(X_scaled)
+    if isinstance(caminos, tuple):
+        caminos = caminos[0]
+    num_arboles = len(raices)
+    aportes = np.asarray((caminos @ aportes_nodos).todense()) / num_arboles
+    sesgo = np.full(len(X_scaled), raices.mean())
+    return aportes, sesgo
+
+
+def contribuciones_xgboost(model, X_scaled, exacto=False):
+    """
+    Aportes por característica de un XGBClassifier usando pred_contribs de XGBoost.
+    Por defecto se usa approx_contribs (mismo reparto por camino que en los árboles de
+    scikit-learn), que cuesta pocas veces una predicción normal; exacto=True calcula
+    valores SHAP exactos, mucho más lentos.
+    Los aportes están en escala logit: sigmoide(aportes.sum(1) + sesgo) == predict_proba[:, 1].
+    """
+    from xgboost import DMatrix
+    contribuciones = model.get_booster().predict(DMatrix(X_scaled), pred_contribs=True, approx_contribs=not exacto)
+    return contribuciones[:, :-1], contribuciones[:, -1]
+
+
+def principales_factores(aportes, nombres, k=3):
+    """
+    Devuelve las k características con mayor aporte absoluto por alumno.
+    Un aporte negativo empuja hacia la deserción (semáforo rojo).
+
+    Returns:
+        DataFrame con columnas factor_1, aporte_1, ..., factor_k, aporte_k.
+    """
+    if k < 1:
+        raise ValueError(f"El número de factores debe ser al menos 1 (se recibió {k}).")
+    k = min(k, aportes.shape[1])
+    nombres = np.asarray(nombres)
+    magnitudes = np.abs(aportes)
+    indices = np.argpartition(-magnitudes, k - 1, axis=1)[:, :k]
+    orden = np.argsort(-np.take_along_axis(magnitudes, indices, axis=1), axis=1)
+    indices = np.take_along_axis(indices, orden, axis=1)
+    valores = np.take_along_axis(aportes, indices, axis=1)
+
+    columnas = {}
+    for i in range(k):
+        columnas[f'factor_{i + 1}'] = nombres[indices[:, i]]
+        columnas[f'aporte_{i + 1}'] = valores[:, i]
+    return pd.DataFrame(columnas)
+
+
+def explicar_por_bloques(X, model, scaler, nombres, k=3, tam_bloque=50000, exacto=False):
+    """
+    Calcula en una sola pasada la probabilidad de graduarse y los k factores principales
+    de cada alumno, procesando las instantáneas por bloques. Funciona con los artefactos
+    de XGBoost.py y randomForest.py (y arbolesDecision.py).
+
+    Returns:
+        (probabilidades, DataFrame de factores principales)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    es_xgboost = hasattr(model, 'get_booster')
+    if not es_xgboost and not hasattr(model, 'tree_') and not hasattr(model, 'estimators_'):
+        raise ValueError(f"El modelo {type(model).__name__} no tiene aportes nativos por característica.")
+    matriz_aportes = None if es_xgboost else _matriz_aportes_arboles(model, X.shape[1])
+
+    probabilidades = np.empty(len(X), dtype=np.float64)
+    factores = []
+    for inicio in range(0, len(X), tam_bloque):
+        bloque = scaler.transform(X[inicio:inicio + tam_bloque])
+        if es_xgboost:
+            aportes, sesgo = contribuciones_xgboost(model, bloque, exacto)
+            probabilidades[inicio:inicio + len(bloque)] = 1 / (1 + np.exp(-(aportes.sum(axis=1) + sesgo)))
+        else:
+            aportes, sesgo = contribuciones_arboles(model, bloque, matriz_aportes)
+            probabilidades[inicio:inicio + len(bloque)] = aportes.sum(axis=1) + sesgo
+        factores.append(principales_factores(aportes, nombres, k))
+
+    if not factores:
+        return probabilidades, principales_factores(np.empty((0, X.shape[1])), nombres, k)
+    return probabilidades, pd.concat(factores, ignore_index=True)
@@ -7,10 +7,17 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import confusion_matrix, roc_auc_score
 import os
 import joblib
+import sys
 import warnings
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utilidades'))
+from instrumentacion import etapa, instrumentar
+from particiones import particiones_invalidas
+from calendario import cargar_calendario
+
 warnings.filterwarnings('ignore')
 
+@instrumentar('cargar_datos', filas=lambda resultado: len(resultado[0]))
 def cargar_y_limpiar_datos(ruta_datos, archivo_graduados):
     """Carga los datos y limpia las calificaciones inválidas (menores a 0)."""
     print("Cargando etiquetas de graduados...")
@@ -21,12 +28,13 @@ def cargar_y_limpiar_datos(ruta_datos, archivo_graduados):
     todos_los_datos = []
     file_pattern = re.compile(r'periodo(\d+)carrera(\d+)semestre(\d+)\.csv')
     columnas_calificaciones = ['p1', 'p2', 'p3', 'o', 'pf', 'e1', 'e2', 'esp']
+    invalidas = particiones_invalidas(ruta_datos)
     
     for root, _, files in os.walk(ruta_datos):
         for file in files:
             if file.endswith('.csv'):
                 match = file_pattern.match(file)
-                if match:
+                if match and tuple(int(g) for g in match.groups()) not in invalidas:
                     try:
                         df = pd.read_csv(os.path.join(root, file))
                         for col in columnas_calificaciones:
@@ -44,6 +52,7 @@ def cargar_y_limpiar_datos(ruta_datos, archivo_graduados):
     full_df = pd.concat(todos_los_datos, ignore_index=True)
     return full_df, graduados
 
+@instrumentar('snapshots', filas=len)
 def crear_dataset_snapshots(df, graduados, period_order, period_order_name):
     """Crea un dataset con 'instantáneas' del progreso de cada alumno por semestre."""
     print("Creando dataset de 'instantáneas' por semestre...")
@@ -98,21 +107,21 @@ def entrenar_modelo_con_kfolds(snapshot_df, num_splits=5):
     
     for fold, (train_idx, val_idx) in enumerate(kf.split(X, y)):
         print(f"Procesando Fold {fold + 1}/{n_splits}...")
+        with etapa('fold', fold=fold + 1, filas=len(train_idx)):
+            X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
+            y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
         
-        X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-        y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
-        
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_val_scaled = scaler.transform(X_val)
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_val_scaled = scaler.transform(X_val)
         
-        model.fit(X_train_scaled, y_train)
+            model.fit(X_train_scaled, y_train)
         
-        probas = model.predict_proba(X_val_scaled)[:, 1]
-        preds = model.predict(X_val_scaled)
+            probas = model.predict_proba(X_val_scaled)[:, 1]
+            preds = model.predict(X_val_scaled)
         
-        auc_scores.append(roc_auc_score(y_val, probas))
-        total_conf_matrix += confusion_matrix(y_val, preds)
+            auc_scores.append(roc_auc_score(y_val, probas))
+            total_conf_matrix += confusion_matrix(y_val, preds)
         
     print("\n--- Resultados de la Validación Cruzada ---")
     print(f"AUC Score Promedio: {np.mean(auc_scores):.4f} (Desv. Estándar: {np.std(auc_scores):.4f})")
@@ -122,9 +131,10 @@ def entrenar_modelo_con_kfolds(snapshot_df, num_splits=5):
     print(f"Real: Graduado        {int(total_conf_matrix[1, 0]):<15} | {int(total_conf_matrix[1, 1]):<15}")
     
     print("\nEntrenando modelo final con todos los datos...")
-    final_scaler = StandardScaler().fit(X)
-    X_scaled = final_scaler.transform(X)
-    model.fit(X_scaled, y)
+    with etapa('modelo_final', filas=len(X)):
+        final_scaler = StandardScaler().fit(X)
+        X_scaled = final_scaler.transform(X)
+        model.fit(X_scaled, y)
     
     joblib.dump(model, 'modelo_desercion_final.pkl')
     joblib.dump(final_scaler, 'scaler_final.pkl')
@@ -156,8 +166,9 @@ if __name__ == '__main__':
     archivo_graduados = './graduados.txt'
     
     # Listas de periodos (necesarias para calcular semestres recursados)
-    period_order = [35, 36, 40, 39, 42, 43, 41, 46, 47, 44, 49, 50, 48, 53, 54, 51, 52, 56, 55, 58, 59, 57, 61]
-    period_order_name = ["2017-2018A", "2017-2018B", "2017-2018V", "2018-2019A", "2018-2019B", "2018-2019V", "2019-2020A", "2019-2020B", "2019-2020V", "2020-2021A", "2020-2021B", "2020-2021V", "2021-2022A", "2021-2022B", "2021-2022V", "2022-2023A", "2022-2023B", "2022-2023V", "2023-2024A", "2023-2024B", "2023-2024V", "2024-2025A", "2024-2025B"]
+    # Calendario que obtenerCSV.py guarda en el árbol (o el calendario por defecto)
+    calendario = cargar_calendario(ruta_a_tus_datos)
+    period_order, period_order_name = calendario.period_order, calendario.period_order_name
 
     # --- FLUJO DE TRABAJO ---
     try:
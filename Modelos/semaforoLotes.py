@@ -0,0 +1,269 @@
+import pandas as pd
+import numpy as np
+import re
+import os
+import time
+import argparse
+import sys
+import joblib
+import warnings
+
+from cacheSemaforo import CacheSemaforo, hash_instantaneas, version_artefacto
+from explicacionSemaforo import explicar_por_bloques
+from artefactoLigero import SEMAFOROS, asignar_semaforo
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utilidades'))
+from instrumentacion import etapa
+from particiones import particiones_invalidas
+from calendario import cargar_calendario
+
+warnings.filterwarnings('ignore')
+
+# Mismo orden de columnas con el que se entrenaron los modelos (crear_dataset_snapshots sin 'resultado_final')
+COLUMNAS_CARACTERISTICAS = [
+    'semestre_actual', 'promedio_p1', 'promedio_p2', 'promedio_p3', 'promedio_final',
+    'promedio_e1', 'promedio_e2', 'promedio_esp', 'semestres_recursados'
+]
+# Columna del CSV de la que sale cada promedio
+COLUMNAS_PROMEDIO = {
+    'promedio_p1': 'p1', 'promedio_p2': 'p2', 'promedio_p3': 'p3', 'promedio_final': 'pf',
+    'promedio_e1': 'e1', 'promedio_e2': 'e2', 'promedio_esp': 'esp'
+}
+
+FILE_PATTERN = re.compile(r'periodo(\d+)carrera(\d+)semestre(\d+)\.csv')
+
+
+def leer_particion(ruta_archivo, periodo, carrera, semestre):
+    """
+    Lee un CSV de calificaciones con solo las columnas necesarias para las instantáneas,
+    convierte las calificaciones negativas en NaN y agrega 'periodo', 'carrera' y 'semestre'.
+
+    Returns:
+        DataFrame, o None si el archivo no tiene la columna 'matricula_hash'.
+    """
+    columnas = {'matricula_hash', *COLUMNAS_PROMEDIO.values()}
+    df = pd.read_csv(ruta_archivo, usecols=lambda c: c in columnas)
+    if 'matricula_hash' not in df.columns:
+        print(f"ADVERTENCIA: El archivo {ruta_archivo} no tiene la columna 'matricula_hash'. Omitiendo.")
+        return None
+    for col in COLUMNAS_PROMEDIO.values():
+        if col in df.columns:
+            df[col] = df[col].mask(df[col] < 0)
+    df['semestre'] = semestre
+    df['periodo'] = periodo
+    df['carrera'] = carrera
+    return df
+
+
+def cargar_calificaciones_hasta(ruta_datos, periodo, period_order):
+    """
+    Carga y limpia los CSV de calificaciones de todos los periodos anteriores o iguales
+    a `periodo` (según el orden de period_order). Solo se leen las columnas necesarias
+    para construir las instantáneas.
+
+    Args:
+        ruta_datos (str): Carpeta que contiene las carpetas 'Periodo_<num>'.
+        periodo (int): id_periodo a puntuar.
+        period_order (list): Orden cronológico de los id_periodo.
+
+    Returns:
+        DataFrame con las calificaciones (negativos convertidos a NaN) y las columnas
+        'periodo', 'carrera' y 'semestre'.
+    """
+    if periodo not in period_order:
+        raise ValueError(f"El periodo {periodo} no está en el calendario de periodos.")
+    periodos_validos = set(period_order[:period_order.index(periodo) + 1])
+    invalidas = particiones_invalidas(ruta_datos)
+
+    todos_los_datos = []
+    for root, _, files in os.walk(ruta_datos):
+        for file in files:
+            match = FILE_PATTERN.match(file)
+            if not match or int(match.group(1)) not in periodos_validos:
+                continue
+            if tuple(int(g) for g in match.groups()) in invalidas:
+                continue
+            try:
+                df = leer_particion(os.path.join(root, file), *(int(g) for g in match.groups()))
+            except Exception as e:
+                print(f"Error leyendo el archivo {file}: {e}")
+                continue
+            if df is not None:
+                todos_los_datos.append(df)
+
+    if not todos_los_datos:
+        raise ValueError("No se encontraron o no se pudieron leer archivos CSV. Verifica la ruta y el contenido de las carpetas.")
+
+    return pd.concat(todos_los_datos, ignore_index=True)
+
+
+def crear_instantaneas_actuales(df, periodo, period_order, period_order_name):
+    """
+    Construye la instantánea más reciente de cada alumno activo en `periodo`
+    (o de todos los alumnos de `df` si periodo es None).
+
+    Equivale a quedarse con la última fila que crear_dataset_snapshots genera para
+    cada alumno, pero calculada con agregaciones de pandas en lugar de un ciclo
+    por alumno.
+
+    Returns:
+        DataFrame indexado por 'matricula_hash' con las COLUMNAS_CARACTERISTICAS.
+    """
+    if periodo is not None:
+        activos = df.loc[df['periodo'] == periodo, 'matricula_hash'].unique()
+        df = df[df['matricula_hash'].isin(activos)]
+    for col in COLUMNAS_PROMEDIO.values():
+        if col not in df.columns:
+            df = df.assign(**{col: np.nan})
+
+    agregaciones = {nombre: (col, 'mean') for nombre, col in COLUMNAS_PROMEDIO.items()}
+    instantaneas = df.groupby('matricula_hash').agg(
+        semestre_actual=('semestre', 'max'),
+        periodo_inicio=('periodo', 'min'),
+        periodo_fin=('periodo', 'max'),
+        **agregaciones
+    )
+
+    # Igual que en crear_dataset_snapshots: los periodos se ubican en el calendario
+    # y se cuentan los periodos regulares (A o B) entre el primero y el último.
+    period_index_map = {period: i for i, period in enumerate(period_order)}
+    inicio = instantaneas['periodo_inicio'].map(period_index_map)
+    fin = instantaneas['periodo_fin'].map(period_index_map)
+    conocidos = inicio.notna() & fin.notna()
+    instantaneas = instantaneas[conocidos]
+    inicio = inicio[conocidos].astype(int).to_numpy()
+    fin = fin[conocidos].astype(int).to_numpy()
+
+    es_regular = np.array([name.endswith('A') or name.endswith('B') for name in period_order_name], dtype=np.int64)
+    regulares_acumulados = np.concatenate([[0], np.cumsum(es_regular)])
+    periodos_regulares = np.where(fin >= inicio, regulares_acumulados[fin + 1] - regulares_acumulados[inicio], 0)
+    semestres = instantaneas['semestre_actual'].to_numpy()
+    instantaneas['semestres_recursados'] = np.maximum(0, (periodos_regulares - semestres) // 2)
+
+    return instantaneas[COLUMNAS_CARACTERISTICAS].fillna(0)
+
+
+def puntuar_por_bloques(X, model, scaler, tam_bloque=50000):
+    """
+    Calcula la probabilidad de graduación de una matriz de instantáneas procesándola
+    en bloques de `tam_bloque` filas (una llamada a transform y predict_proba por bloque).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    probabilidades = np.empty(len(X), dtype=np.float64)
+    for inicio in range(0, len(X), tam_bloque):
+        bloque = scaler.transform(X[inicio:inicio + tam_bloque])
+        probabilidades[inicio:inicio + tam_bloque] = model.predict_proba(bloque)[:, 1]
+    return probabilidades
+
+
+def puntuar_periodo(ruta_datos, periodo, model, scaler, period_order=None,
+                    period_order_name=None, tam_bloque=50000, cache=None, explicar=0):
+    """
+    Puntúa a todos los alumnos activos de un periodo con su instantánea más reciente.
+    Si se proporciona una CacheSemaforo, solo se puntúan los alumnos cuya instantánea
+    (o el modelo) cambió desde la última ejecución. Con explicar=k > 0 se agregan los
+    k factores que más aportan a la predicción de cada alumno (en ese caso se puntúa a
+    todos, porque la caché solo guarda probabilidades). Sin period_order se usa el
+    calendario del árbol (cargar_calendario).
+
+    Returns:
+        DataFrame con 'matricula_hash', 'probabilidad_graduarse' y 'semaforo'
+        (más factor_i/aporte_i si explicar > 0).
+    """
+    if period_order is None:
+        calendario = cargar_calendario(ruta_datos)
+        period_order, period_order_name = calendario.period_order, calendario.period_order_name
+    print(f"Cargando calificaciones hasta el periodo {periodo}...")
+    with etapa('puntuacion_carga', periodo=periodo) as registro:
+        df = cargar_calificaciones_hasta(ruta_datos, periodo, period_order)
+        registro['filas'] = len(df)
+
+    print("Construyendo instantáneas actuales...")
+    with etapa('puntuacion_instantaneas', periodo=periodo) as registro:
+        instantaneas = crear_instantaneas_actuales(df, periodo, period_order, period_order_name)
+        registro['filas'] = len(instantaneas)
+    if instantaneas.empty:
+        print(f"No hay alumnos activos en el periodo {periodo}.")
+
+    matriculas = instantaneas.index.to_numpy()
+    if cache is not None:
+        hashes = hash_instantaneas(instantaneas)
+    if cache is not None and not explicar:
+        probabilidades = cache.consultar(matriculas, hashes)
+        pendientes = np.isnan(probabilidades)
+        print(f"Caché: {len(instantaneas) - pendientes.sum()} alumnos sin cambios, {pendientes.sum()} por puntuar.")
+    else:
+        probabilidades = np.empty(len(instantaneas), dtype=np.float64)
+        pendientes = np.ones(len(instantaneas), dtype=bool)
+
+    print(f"Puntuando {pendientes.sum()} alumnos en bloques de {tam_bloque}...")
+    inicio = time.perf_counter()
+    factores = None
+    with etapa('puntuacion_modelo', periodo=periodo, filas=int(pendientes.sum()), explicar=explicar):
+        if explicar:
+            probabilidades, factores = explicar_por_bloques(instantaneas.to_numpy(), model, scaler, COLUMNAS_CARACTERISTICAS, explicar, tam_bloque)
+        else:
+            probabilidades[pendientes] = puntuar_por_bloques(instantaneas.to_numpy()[pendientes], model, scaler, tam_bloque)
+    duracion = time.perf_counter() - inicio
+    filas_por_segundo = pendientes.sum() / duracion if duracion > 0 else float('inf')
+    if cache is not None:
+        cache.guardar(matriculas[pendientes], hashes[pendientes], probabilidades[pendientes])
+    print(f"Puntuación completada en {duracion:.3f} s ({filas_por_segundo:,.0f} filas/s).")
+
+    resultados = pd.DataFrame({
+        'matricula_hash': matriculas,
+        'probabilidad_graduarse': probabilidades,
+        'semaforo': pd.Categorical(asignar_semaforo(probabilidades), categories=list(SEMAFOROS)),
+    })
+    if factores is not None:
+        resultados = pd.concat([resultados, factores], axis=1)
+    return resultados
+
+
+def guardar_resultados(resultados, ruta_salida):
+    """Guarda los resultados en Parquet (o en CSV si la ruta termina en .csv)."""
+    if ruta_salida.endswith('.csv'):
+        resultados.to_csv(ruta_salida, index=False)
+    else:
+        resultados.to_parquet(ruta_salida, index=False)
+    print(f"Resultados guardados en '{ruta_salida}' ({len(resultados)} alumnos).")
+
+
+# --- EJECUCIÓN PRINCIPAL ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Puntúa con el semáforo a todos los alumnos activos de un periodo.")
+    parser.add_argument('periodo', type=int, help="id_periodo a puntuar (por ejemplo 61).")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's", help="Carpeta con las carpetas Periodo_<num>.")
+    parser.add_argument('--modelo', default='modelo_xgboost_final.pkl')
+    parser.add_argument('--escalador', default='scaler_xgboost_final.pkl')
+    parser.add_argument('--salida', default=None, help="Archivo .parquet (o .csv) de salida.")
+    parser.add_argument('--tam-bloque', type=int, default=50000)
+    parser.add_argument('--explicar', type=int, default=0, metavar='K', help="Agrega los K factores que más aportan a cada predicción (XGBoost o RandomForest).")
+    parser.add_argument('--cache', default=None, help="Archivo SQLite para reutilizar predicciones de alumnos sin cambios.")
+    args = parser.parse_args()
+    if args.explicar < 0:
+        parser.error("--explicar debe ser 0 (sin explicaciones) o un número positivo de factores.")
+
+    salida = args.salida or f"semaforo_periodo{args.periodo}.parquet"
+
+    cache = None
+    try:
+        modelo = joblib.load(args.modelo)
+        escalador = joblib.load(args.escalador)
+        cache = CacheSemaforo(args.cache, version_artefacto(args.modelo, args.escalador)) if args.cache else None
+        inicio_total = time.perf_counter()
+        calendario = cargar_calendario(args.datos)
+        resultados = puntuar_periodo(args.datos, args.periodo, modelo, escalador, calendario.period_order, calendario.period_order_name,
+                                     tam_bloque=args.tam_bloque, cache=cache, explicar=args.explicar)
+        guardar_resultados(resultados, salida)
+        duracion_total = time.perf_counter() - inicio_total
+        print(f"Tiempo total: {duracion_total:.2f} s ({len(resultados) / duracion_total:,.0f} filas/s de extremo a extremo).")
+        print(resultados['semaforo'].value_counts())
+    except FileNotFoundError as e:
+        print(f"ERROR: No se encontró el archivo: {e}. Verifica las rutas del modelo, del escalador y de los datos.")
+    except ValueError as ve:
+        print(f"ERROR: {ve}")
+    finally:
+        # La conexión SQLite se cierra también si la puntuación falla a la mitad
+        if cache is not None:
+            cache.cerrar()
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import time
+import argparse
+from collections import deque
+import numpy as np
+import joblib
+import warnings
+
+from semaforoLotes import COLUMNAS_CARACTERISTICAS, asignar_semaforo, puntuar_por_bloques
+from artefactoLigero import filas_alumnos
+
+warnings.filterwarnings('ignore')
+
+MENSAJES_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class Metricas:
+    """Contadores de latencia y rendimiento del servicio."""
+
+    def __init__(self, ventana=10000):
+        self.latencias_ms = deque(maxlen=ventana)
+        self.inicio = time.perf_counter()
+        self.peticiones = 0
+        self.alumnos = 0
+        self.lotes = 0
+        self.errores = 0
+
+    def registrar_peticion(self, latencia_ms, num_alumnos):
+        self.latencias_ms.append(latencia_ms)
+        self.peticiones += 1
+        self.alumnos += num_alumnos
+
+    def resumen(self):
+        transcurrido = time.perf_counter() - self.inicio
+        latencias = np.fromiter(self.latencias_ms, dtype=np.float64)
+        p50, p99 = np.percentile(latencias, [50, 99]) if len(latencias) else (0.0, 0.0)
+        return {
+            'peticiones': self.peticiones,
+            'alumnos_puntuados': self.alumnos,
+            'lotes_predict_proba': self.lotes,
+            'alumnos_por_lote': self.alumnos / self.lotes if self.lotes else 0.0,
+            'errores': self.errores,
+            'latencia_p50_ms': float(p50),
+            'latencia_p99_ms': float(p99),
+            'peticiones_por_segundo': self.peticiones / transcurrido,
+            'alumnos_por_segundo': self.alumnos / transcurrido,
+            'segundos_activo': transcurrido,
+        }
+
+
+class MicroLoteador:
+    """
+    Junta las peticiones concurrentes en micro-lotes para hacer una sola llamada
+    a predict_proba por lote.
+
+    Args:
+        model: Modelo entrenado con predict_proba.
+        scaler: Escalador usado en el entrenamiento.
+        metricas (Metricas): Contadores del servicio.
+        max_lote (int): Máximo de alumnos por micro-lote.
+        espera_ms (float): Tiempo máximo que se espera a más peticiones antes de puntuar.
+    """
+
+    def __init__(self, model, scaler, metricas, max_lote=512, espera_ms=2.0):
+        self.model = model
+        self.scaler = scaler
+        self.metricas = metricas
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self.cola = asyncio.Queue()
+
+    async def predecir(self, filas):
+        """Encola una matriz de instantáneas y espera sus probabilidades."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((filas, futuro))
+        return await futuro
+
+    async def ciclo(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self.cola.get()]
+            num_filas = len(pendientes[0][0])
+            limite = loop.time() + self.espera
+            while num_filas < self.max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    pendiente = await asyncio.wait_for(self.cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                pendientes.append(pendiente)
+                num_filas += len(pendiente[0])
+
+            # Las peticiones canceladas (cliente desconectado o servidor cerrándose) ya no esperan resultado
+            pendientes = [(filas, futuro) for filas, futuro in pendientes if not futuro.done()]
+            if not pendientes:
+                continue
+            X = np.vstack([filas for filas, _ in pendientes])
+            try:
+                # predict_proba libera el GIL, se ejecuta fuera del loop para no bloquear la red
+                probabilidades = await loop.run_in_executor(None, puntuar_por_bloques, X, self.model, self.scaler, len(X))
+            except Exception as e:
+                for _, futuro in pendientes:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+            self.metricas.lotes += 1
+
+            inicio = 0
+            for filas, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_result(probabilidades[inicio:inicio + len(filas)])
+                inicio += len(filas)
+
+
+def convertir_alumnos(payload):
+    """
+    Convierte el cuerpo de la petición (un diccionario con el esquema de predecir_semaforo
+    o una lista de ellos) en una matriz con las COLUMNAS_CARACTERISTICAS. Cada alumno se
+    valida con artefactoLigero.filas_alumnos, igual que tesis.py score --alumno.
+    """
+    es_lista = isinstance(payload, list)
+    alumnos = payload if es_lista else [payload]
+    if not alumnos or not all(isinstance(alumno, dict) for alumno in alumnos):
+        raise ValueError("Se esperaba un objeto JSON o una lista no vacía de objetos.")
+    return filas_alumnos(alumnos, COLUMNAS_CARACTERISTICAS), es_lista
+
+
+class ServicioSemaforo:
+    """Servidor HTTP mínimo sobre asyncio para consultar el semáforo de riesgo."""
+
+    def __init__(self, model, scaler, max_lote=512, espera_ms=2.0):
+        self.metricas = Metricas()
+        self.loteador = MicroLoteador(model, scaler, self.metricas, max_lote, espera_ms)
+        self.tarea_lotes = None
+
+    def iniciar_lotes(self):
+        """Arranca el ciclo de micro-lotes; si termina por un error, se registra y se vuelve a arrancar."""
+        self.tarea_lotes = asyncio.create_task(self.loteador.ciclo())
+        self.tarea_lotes.add_done_callback(self._lotes_terminados)
+
+    def _lotes_terminados(self, tarea):
+        if tarea.cancelled():
+            return
+        self.metricas.errores += 1
+        print(f"ERROR: El ciclo de micro-lotes terminó inesperadamente ({tarea.exception()!r}); se reinicia.")
+        self.iniciar_lotes()
+
+    async def atender(self, reader, writer):
+        try:
+            linea = await reader.readline()
+            if not linea:
+                return
+            metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+            longitud = 0
+            while True:
+                cabecera = await reader.readline()
+                if cabecera in (b'\r\n', b'\n', b''):
+                    break
+                nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                if nombre.strip().lower() == 'content-length':
+                    longitud = int(valor.strip())
+            cuerpo = await reader.readexactly(longitud) if longitud else b''
+            estado, respuesta = await self.despachar(metodo, ruta.split('?')[0], cuerpo)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            self.metricas.errores += 1
+            estado, respuesta = 400, {'error': str(e)}
+
+        datos = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {estado} {MENSAJES_HTTP[estado]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + datos
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def despachar(self, metodo, ruta, cuerpo):
+        if ruta == '/metricas':
+            return 200, self.metricas.resumen()
+        if ruta == '/salud':
+            return 200, {'estado': 'ok'}
+        if ruta != '/predecir':
+            return 404, {'error': f"Ruta desconocida: {ruta}"}
+        if metodo != 'POST':
+            return 405, {'error': "Usa POST en /predecir."}
+
+        inicio = time.perf_counter()
+        try:
+            filas, es_lista = convertir_alumnos(json.loads(cuerpo))
+        except ValueError as e:
+            self.metricas.errores += 1
+            return 400, {'error': str(e)}
+        try:
+            probabilidades = await self.loteador.predecir(filas)
+        except Exception as e:
+            self.metricas.errores += 1
+            return 500, {'error': f"Error al predecir: {e}"}
+
+        semaforos = asignar_semaforo(probabilidades)
+        resultados = [
+            {'semaforo': str(semaforo), 'probabilidad_graduarse': float(prob)}
+            for semaforo, prob in zip(semaforos, probabilidades)
+        ]
+        self.metricas.registrar_peticion((time.perf_counter() - inicio) * 1000, len(filas))
+        return 200, resultados if es_lista else resultados[0]
+
+    async def servir(self, host, puerto):
+        self.iniciar_lotes()
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        print(f"Servicio del semáforo escuchando en http://{host}:{puerto} (POST /predecir, GET /metricas)")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self.tarea_lotes.cancel()
+
+
+# --- EJECUCIÓN PRINCIPAL ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servicio HTTP local del semáforo de riesgo con micro-lotes.")
+    parser.add_argument('--modelo', default='modelo_xgboost_final.pkl')
+    parser.add_argument('--escalador', default='scaler_xgboost_final.pkl')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--max-lote', type=int, default=512, help="Máximo de alumnos por llamada a predict_proba.")
+    parser.add_argument('--espera-ms', type=float, default=2.0, help="Espera máxima para completar un micro-lote.")
+    args = parser.parse_args()
+
+    try:
+        print("Cargando modelo y escalador...")
+        modelo = joblib.load(args.modelo)
+        escalador = joblib.load(args.escalador)
+    except FileNotFoundError as e:
+        print(f"ERROR: No se encontró el archivo: {e}. Verifica las rutas del modelo y del escalador.")
+    else:
+        servicio = ServicioSemaforo(modelo, escalador, args.max_lote, args.espera_ms)
+        try:
+            asyncio.run(servicio.servir(args.host, args.puerto))
+        except KeyboardInterrupt:
+            print("\nServicio detenido.")
+            print(json.dumps(servicio.metricas.resumen(), indent=2, ensure_ascii=False))
@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+import argparse
+from collections import defaultdict
+import pandas as pd
+import numpy as np
+import joblib
+import warnings
+
+from semaforoLotes import (
+    FILE_PATTERN, SEMAFOROS,
+    leer_particion, crear_instantaneas_actuales, puntuar_por_bloques, asignar_semaforo
+)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utilidades'))
+from graduados import identify_graduated_students
+from calendario import cargar_calendario
+
+warnings.filterwarnings('ignore')
+
+
+def escanear_particiones(ruta_datos):
+    """
+    Obtiene la firma de cada partición del árbol de exportación: el tamaño y la fecha de
+    modificación del propio CSV (la misma firma que particiones.firma_particiones), así que
+    cualquier edición del archivo se detecta aunque no se reescriba 'manifiesto.json'.
+
+    Returns:
+        dict: {ruta_csv: (firma, periodo, carrera, semestre)}
+    """
+    particiones = {}
+    for root, _, files in os.walk(ruta_datos):
+        for file in files:
+            match = FILE_PATTERN.match(file)
+            if not match:
+                continue
+            ruta = os.path.join(root, file)
+            info = os.stat(ruta)
+            particiones[ruta] = (f"{info.st_size}:{info.st_mtime_ns}", *(int(g) for g in match.groups()))
+    return particiones
+
+
+class PipelineVigilancia:
+    """
+    Mantiene en memoria las particiones ya procesadas y, en cada revisión, vuelve a
+    leer solo las particiones nuevas o modificadas. Las etiquetas de graduación, las
+    instantáneas y el semáforo se recalculan únicamente para los alumnos que aparecen
+    en esas particiones, y la tabla de riesgo se publica de forma atómica.
+
+    Args:
+        ruta_datos (str): Carpeta con las carpetas 'Periodo_<num>'.
+        model, scaler: Artefactos entrenados (por ejemplo los de XGBoost.py).
+        ruta_tabla (str): Archivo .parquet o .csv donde se publica la tabla de riesgo.
+        archivo_graduados (str): Si se indica, se reescribe con las etiquetas actualizadas.
+        period_order, period_order_name (list): Calendario de periodos (por defecto, el del árbol).
+    """
+
+    def __init__(self, ruta_datos, model, scaler, ruta_tabla, archivo_graduados=None,
+                 period_order=None, period_order_name=None, tam_bloque=50000):
+        self.ruta_datos = ruta_datos
+        self.model = model
+        self.scaler = scaler
+        self.ruta_tabla = ruta_tabla
+        self.archivo_graduados = archivo_graduados
+        if period_order is None:
+            calendario = cargar_calendario(ruta_datos)
+            period_order, period_order_name = calendario.period_order, calendario.period_order_name
+        self.period_order = period_order
+        self.period_order_name = period_order_name
+        self.period_index_map = {period: i for i, period in enumerate(period_order)}
+        self.tam_bloque = tam_bloque
+
+        self.firmas = {}
+        self.datos = {}
+        self.graduados = set()
+        self.tabla = pd.DataFrame(columns=['ultimo_periodo', 'graduado', 'probabilidad_graduarse', 'semaforo'])
+        self.tabla.index.name = 'matricula_hash'
+
+    def revisar(self):
+        """
+        Detecta cambios en el árbol y reprocesa a los alumnos afectados.
+
+        Returns:
+            int: Número de alumnos recalculados (0 si no hubo cambios).
+        """
+        actuales = escanear_particiones(self.ruta_datos)
+        cambiadas = [ruta for ruta, info in actuales.items() if self.firmas.get(ruta, (None,))[0] != info[0]]
+        eliminadas = [ruta for ruta in self.firmas if ruta not in actuales]
+        if not cambiadas and not eliminadas:
+            return 0
+
+        inicio = time.perf_counter()
+        print(f"Particiones nuevas o modificadas: {len(cambiadas)}, eliminadas: {len(eliminadas)}.")
+        afectados = set()
+        for ruta in eliminadas:
+            # Una partición sin filas válidas tiene firma pero no datos
+            anterior = self.datos.pop(ruta, None)
+            if anterior is not None:
+                afectados.update(anterior['matricula_hash'].unique())
+            del self.firmas[ruta]
+        for ruta in cambiadas:
+            if ruta in self.datos:
+                afectados.update(self.datos.pop(ruta)['matricula_hash'].unique())
+            _, periodo, carrera, semestre = actuales[ruta]
+            try:
+                df = leer_particion(ruta, periodo, carrera, semestre)
+            except Exception as e:
+                print(f"Error leyendo el archivo {ruta}: {e}")
+                continue
+            self.firmas[ruta] = actuales[ruta]
+            if df is not None:
+                self.datos[ruta] = df
+                afectados.update(df['matricula_hash'].unique())
+
+        self.actualizar_alumnos(afectados)
+        self.publicar()
+        print(f"{len(afectados)} alumnos recalculados en {time.perf_counter() - inicio:.2f} s.")
+        return len(afectados)
+
+    def actualizar_alumnos(self, afectados):
+        """Recalcula etiqueta, instantánea y semáforo de los alumnos indicados."""
+        afectados = np.array(sorted(afectados), dtype=object)
+        self.tabla = self.tabla.drop(index=self.tabla.index.intersection(afectados))
+        self.graduados.difference_update(afectados)
+        if not len(afectados) or not self.datos:
+            return
+
+        historial = pd.concat(
+            [df[df['matricula_hash'].isin(afectados)] for df in self.datos.values()],
+            ignore_index=True
+        )
+        historial = historial[historial['periodo'].isin(self.period_index_map)]
+        if historial.empty:
+            return
+        historial['indice_periodo'] = historial['periodo'].map(self.period_index_map)
+
+        # Etiquetas: primer periodo (cronológico) en que el alumno cursó cada semestre de cada carrera
+        primeros = historial.groupby(['matricula_hash', 'carrera', 'semestre'])['indice_periodo'].min()
+        student_progress = defaultdict(lambda: defaultdict(dict))
+        for (student_hash, carrera, semestre), indice in primeros.items():
+            student_progress[student_hash][carrera][semestre] = self.period_order[indice]
+        self.graduados.update(identify_graduated_students(student_progress, self.period_order, self.period_order_name))
+
+        instantaneas = crear_instantaneas_actuales(historial, None, self.period_order, self.period_order_name)
+        probabilidades = puntuar_por_bloques(instantaneas.to_numpy(), self.model, self.scaler, self.tam_bloque)
+        ultimo = historial.groupby('matricula_hash')['indice_periodo'].max().reindex(instantaneas.index)
+
+        nuevos = pd.DataFrame({
+            'ultimo_periodo': np.asarray(self.period_order)[ultimo.to_numpy()],
+            'graduado': instantaneas.index.isin(list(self.graduados)),
+            'probabilidad_graduarse': probabilidades,
+            'semaforo': asignar_semaforo(probabilidades),
+        }, index=instantaneas.index)
+        self.tabla = pd.concat([self.tabla, nuevos]) if len(self.tabla) else nuevos
+        self.tabla.index.name = 'matricula_hash'
+
+    def publicar(self):
+        """Escribe la tabla de riesgo en un archivo temporal y lo reemplaza de forma atómica."""
+        tabla = self.tabla.sort_index().reset_index()
+        tabla['semaforo'] = pd.Categorical(tabla['semaforo'], categories=list(SEMAFOROS))
+        temporal = self.ruta_tabla + '.tmp'
+        if self.ruta_tabla.endswith('.csv'):
+            tabla.to_csv(temporal, index=False)
+        else:
+            tabla.to_parquet(temporal, index=False)
+        os.replace(temporal, self.ruta_tabla)
+        print(f"Tabla de riesgo publicada en '{self.ruta_tabla}' ({len(tabla)} alumnos).")
+
+        if self.archivo_graduados:
+            with open(self.archivo_graduados, 'w') as f:
+                for student_hash in sorted(self.graduados):
+                    f.write(f"{student_hash}\n")
+
+    def vigilar(self, intervalo=60):
+        """Revisa el árbol de exportación cada `intervalo` segundos hasta que se interrumpa."""
+        print(f"Vigilando '{self.ruta_datos}' cada {intervalo} s (Ctrl+C para detener)...")
+        while True:
+            self.revisar()
+            time.sleep(intervalo)
+
+
+# --- EJECUCIÓN PRINCIPAL ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mantiene actualizada la tabla de riesgo conforme aparecen particiones nuevas.")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's", help="Carpeta con las carpetas Periodo_<num>.")
+    parser.add_argument('--modelo', default='modelo_xgboost_final.pkl')
+    parser.add_argument('--escalador', default='scaler_xgboost_final.pkl')
+    parser.add_argument('--salida', default='tabla_riesgo.parquet')
+    parser.add_argument('--graduados', default=None, help="Archivo de graduados a mantener actualizado.")
+    parser.add_argument('--intervalo', type=float, default=60, help="Segundos entre revisiones.")
+    parser.add_argument('--una-vez', action='store_true', help="Hace una sola revisión y termina.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.datos):
+        print(f"❌ ERROR: El directorio especificado '{args.datos}' no existe.")
+    else:
+        try:
+            pipeline = PipelineVigilancia(args.datos, joblib.load(args.modelo), joblib.load(args.escalador),
+                                          args.salida, args.graduados)
+        except FileNotFoundError as e:
+            print(f"ERROR: No se encontró el archivo: {e}. Verifica las rutas del modelo y del escalador.")
+        else:
+            try:
+                if args.una_vez:
+                    pipeline.revisar()
+                else:
+                    pipeline.vigilar(args.intervalo)
+            except KeyboardInterrupt:
+                print("\nVigilancia detenida.")
@@ -0,0 +1,95 @@
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime
+
+from baseDatosNES import crear_sqlite_sintetica, parametros_sqlite, obtener_backend, BackendSQLite
+from benchmarkPipeline import version_codigo, medir, comparar_con_anteriores
+from obtenerCSV import ESTRATEGIAS, generate_grade_csvs
+
+
+def preparar_base(carpeta_trabajo, num_alumnos, semilla=0):
+    """Crea (o reutiliza, si ya existe con los mismos parámetros) la BD SQLite sintética de una escala."""
+    ruta = os.path.join(carpeta_trabajo, f"nes_sintetica_{num_alumnos}_{semilla}.sqlite")
+    parametros = parametros_sqlite(ruta)
+    if parametros and parametros.get('num_alumnos') == num_alumnos and parametros.get('semilla') == semilla:
+        return BackendSQLite(ruta)
+    print(f"Creando BD sintética con {num_alumnos} alumnos en '{ruta}'...")
+    os.makedirs(carpeta_trabajo, exist_ok=True)
+    crear_sqlite_sintetica(ruta, num_alumnos=num_alumnos, semilla=semilla)
+    return BackendSQLite(ruta)
+
+
+def tamano_arbol(ruta):
+    """Bytes de todos los CSV de un árbol de exportación."""
+    return sum(os.path.getsize(os.path.join(raiz, archivo))
+               for raiz, _, archivos in os.walk(ruta) for archivo in archivos if archivo.startswith('periodo'))
+
+
+def medir_estrategias(backend, carpeta_trabajo, estrategias=ESTRATEGIAS, procesos=None, tam_lote=50000, detallado=False):
+    """
+    Exporta la base completa con cada estrategia y verifica que todas produzcan los mismos
+    CSV (mismo manifiesto con filas y SHA-256 por partición).
+
+    Returns:
+        list de dict con 'etapa', 'segundos', 'filas', 'particiones' y 'bytes'.
+    """
+    registros = []
+    referencia = None
+    for estrategia in estrategias:
+        salida = os.path.join(carpeta_trabajo, f"exportacion_{estrategia}")
+        shutil.rmtree(salida, ignore_errors=True)
+        manifiestos, segundos = medir(generate_grade_csvs, salida, backend=backend, strategy=estrategia,
+                                      processes=procesos, batch_size=tam_lote, detallado=detallado)
+        particiones = {f"{periodo}/{clave}": entrada for periodo, manifiesto in manifiestos.items() for clave, entrada in manifiesto.items()}
+        if not particiones:
+            print(f"ADVERTENCIA: La estrategia '{estrategia}' no exportó ninguna partición.")
+        elif referencia is None:
+            referencia = particiones
+        elif particiones != referencia:
+            print(f"ADVERTENCIA: La estrategia '{estrategia}' no produjo los mismos CSV que '{estrategias[0]}'.")
+        registros.append({'etapa': f"exportar_{estrategia}", 'segundos': segundos,
+                          'filas': sum(entrada['filas'] for entrada in particiones.values()),
+                          'particiones': len(particiones), 'bytes': tamano_arbol(salida)})
+    return registros
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide la exportación a CSV (filas/s) con cada estrategia sobre una BD sintética o real.")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[10000], help="Número de alumnos de cada BD sintética.")
+    parser.add_argument('--backend', default=None,
+                        help="Medir contra una BD existente ('postgres://...' o 'sqlite:///ruta') en lugar de las sintéticas.")
+    parser.add_argument('--estrategias', nargs='+', default=ESTRATEGIAS, choices=ESTRATEGIAS)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--lote', type=int, default=50000)
+    parser.add_argument('--trabajo', default='benchmark_exportador', help="Carpeta para las BD sintéticas y los árboles exportados.")
+    parser.add_argument('--resultados', default='resultados_exportador.jsonl')
+    parser.add_argument('--umbral', type=float, default=1.25)
+    parser.add_argument('--detallado', action='store_true')
+    args = parser.parse_args()
+
+    version = version_codigo()
+    escalas = [None] if args.backend else args.escalas
+    for escala in escalas:
+        backend = obtener_backend(args.backend) if args.backend else preparar_base(args.trabajo, escala)
+        registros = medir_estrategias(backend, os.path.join(args.trabajo, f"trabajo_{escala or 'bd'}"), args.estrategias,
+                                      args.procesos, args.lote, args.detallado)
+
+        fecha = datetime.now().isoformat(timespec='seconds')
+        for r in registros:
+            # 'modelo' identifica el origen de datos para comparar solo mediciones equivalentes
+            r.update({'fecha': fecha, 'version': version, 'escala': escala, 'modelo': repr(backend) if args.backend else 'sqlite',
+                      'cpus': os.cpu_count(), 'procesos': args.procesos, 'lote': args.lote,
+                      'filas_por_segundo': r['filas'] / r['segundos'] if r['segundos'] > 0 else None})
+        comparar_con_anteriores(registros, args.resultados, args.umbral)
+        with open(args.resultados, 'a', encoding='utf-8') as f:
+            for r in registros:
+                f.write(json.dumps(r, ensure_ascii=False) + '\n')
+
+        print(f"\n--- Exportación: {escala or repr(backend)} ---")
+        for r in registros:
+            relacion = f" (x{r['relacion_anterior']:.2f} vs. anterior)" if r.get('relacion_anterior') else ''
+            print(f"{r['etapa']:<20} {r['segundos']:>8.2f} s  {r['filas']:>10} filas  {r['filas_por_segundo'] or 0:>10,.0f} filas/s  "
+                  f"{r['bytes'] / 2 ** 20:>8.1f} MB{relacion}")
+    print(f"\nResultados agregados a '{args.resultados}'.")
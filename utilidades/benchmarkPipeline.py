@@ -0,0 +1,164 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import importlib
+import contextlib
+import subprocess
+from datetime import datetime
+
+from datosSinteticos import escribir_arbol
+from calendario import cargar_calendario
+import instrumentacion
+
+RUTA_MODELOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelos')
+sys.path.append(RUTA_MODELOS)
+
+ETAPAS = ['graduados', 'cargador', 'snapshots', 'entrenamiento', 'puntuacion']
+
+
+def version_codigo():
+    """Commit actual del repositorio (o 'desconocida' fuera de git)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocida'
+
+
+def preparar_datos(carpeta_trabajo, num_alumnos, semilla=0):
+    """Genera (o reutiliza, si ya existe con los mismos parámetros) el árbol sintético de una escala."""
+    ruta = os.path.join(carpeta_trabajo, f"sintetico_{num_alumnos}_{semilla}")
+    ruta_parametros = os.path.join(ruta, 'parametros_sinteticos.json')
+    if os.path.exists(ruta_parametros):
+        with open(ruta_parametros, encoding='utf-8') as f:
+            parametros = json.load(f)['parametros']
+        if parametros.get('num_alumnos') == num_alumnos and parametros.get('semilla') == semilla:
+            return ruta, None
+    print(f"Generando datos sintéticos con {num_alumnos} alumnos en '{ruta}'...")
+    inicio = time.perf_counter()
+    resumen = escribir_arbol(ruta, num_alumnos=num_alumnos, semilla=semilla)
+    return ruta, {'etapa': 'generador', 'segundos': time.perf_counter() - inicio, 'filas': resumen['filas']}
+
+
+def medir(funcion, *args, detallado=False, **kwargs):
+    """Ejecuta una etapa y devuelve (resultado, segundos); sus print se ocultan salvo en modo detallado."""
+    salida = contextlib.nullcontext() if detallado else contextlib.redirect_stdout(io.StringIO())
+    inicio = time.perf_counter()
+    with salida:
+        resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def ejecutar_escala(ruta_datos, carpeta_trabajo, modelo='XGBoost', etapas=ETAPAS, num_splits=5, detallado=False):
+    """
+    Mide las etapas del pipeline sobre un árbol de datos. Se ejecuta dentro de
+    `carpeta_trabajo` porque graduados.py y los scripts de modelos escriben ahí sus archivos.
+
+    Returns:
+        list de dict con 'etapa', 'segundos' y 'filas'.
+    """
+    from graduados import analyze_student_graduation
+    from semaforoLotes import puntuar_periodo
+    modulo = importlib.import_module(modelo)
+
+    ruta_datos = os.path.abspath(ruta_datos)
+    directorio_original = os.getcwd()
+    os.makedirs(carpeta_trabajo, exist_ok=True)
+    os.chdir(carpeta_trabajo)
+    registros = []
+    try:
+        # graduados.txt es la entrada del cargador, así que siempre se calcula primero
+        graduados, segundos = medir(analyze_student_graduation, ruta_datos, detallado=detallado)
+        if 'graduados' in etapas:
+            registros.append({'etapa': 'graduados', 'segundos': segundos, 'filas': len(graduados)})
+
+        necesita_datos = any(e in etapas for e in ('cargador', 'snapshots', 'entrenamiento'))
+        if necesita_datos:
+            (df, graduados), segundos = medir(modulo.cargar_y_limpiar_datos, ruta_datos, 'graduados.txt', detallado=detallado)
+            if 'cargador' in etapas:
+                registros.append({'etapa': 'cargador', 'segundos': segundos, 'filas': len(df)})
+
+        calendario = cargar_calendario(ruta_datos)
+        if 'snapshots' in etapas or 'entrenamiento' in etapas:
+            snapshots, segundos = medir(modulo.crear_dataset_snapshots, df, graduados, calendario.period_order,
+                                        calendario.period_order_name, detallado=detallado)
+            if 'snapshots' in etapas:
+                registros.append({'etapa': 'snapshots', 'segundos': segundos, 'filas': len(snapshots)})
+
+        if 'entrenamiento' in etapas:
+            (model, scaler), segundos = medir(modulo.entrenar_modelo_con_kfolds, snapshots, num_splits, detallado=detallado)
+            registros.append({'etapa': 'entrenamiento', 'segundos': segundos, 'filas': len(snapshots)})
+
+        if 'puntuacion' in etapas:
+            if 'entrenamiento' not in etapas:
+                print("ADVERTENCIA: La puntuación necesita el modelo entrenado; agrega la etapa 'entrenamiento'.")
+            else:
+                resultados, segundos = medir(puntuar_periodo, ruta_datos, calendario.period_order[-1], model, scaler,
+                                             calendario.period_order, calendario.period_order_name, detallado=detallado)
+                registros.append({'etapa': 'puntuacion', 'segundos': segundos, 'filas': len(resultados)})
+    finally:
+        os.chdir(directorio_original)
+    return registros
+
+
+def comparar_con_anteriores(registros, ruta_resultados, umbral=1.25):
+    """Compara cada etapa con la última medición de la misma escala, etapa y modelo y avisa de regresiones."""
+    anteriores = {}
+    if os.path.exists(ruta_resultados):
+        with open(ruta_resultados, encoding='utf-8') as f:
+            for linea in f:
+                r = json.loads(linea)
+                anteriores[(r['escala'], r['etapa'], r['modelo'])] = r
+
+    for r in registros:
+        anterior = anteriores.get((r['escala'], r['etapa'], r['modelo']))
+        if anterior is None or anterior['segundos'] <= 0:
+            r['relacion_anterior'] = None
+            continue
+        r['relacion_anterior'] = r['segundos'] / anterior['segundos']
+        if r['relacion_anterior'] > umbral:
+            print(f"ADVERTENCIA: Regresión en '{r['etapa']}' ({r['escala']} alumnos): {anterior['segundos']:.2f} s "
+                  f"({anterior['version']}) -> {r['segundos']:.2f} s (x{r['relacion_anterior']:.2f}).")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide el pipeline completo sobre datos sintéticos a distintas escalas.")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[10000, 100000], help="Número de alumnos de cada escala.")
+    parser.add_argument('--etapas', nargs='+', default=ETAPAS, choices=ETAPAS)
+    parser.add_argument('--modelo', default='XGBoost', help="Script de Modelos/ a medir (XGBoost, randomForest, SVC, arbolesDecision).")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--trabajo', default='benchmark', help="Carpeta para los datos sintéticos y los archivos intermedios.")
+    parser.add_argument('--resultados', default='resultados_benchmark.jsonl')
+    parser.add_argument('--umbral', type=float, default=1.25, help="Relación de tiempo contra la medición anterior a partir de la cual se avisa.")
+    parser.add_argument('--detallado', action='store_true', help="Mostrar la salida de cada etapa.")
+    parser.add_argument('--instrumentacion', default=None,
+                        help="JSONL donde se registran las subetapas (folds, recopilación, puntuación) con tiempo y memoria.")
+    parser.add_argument('--perfil', choices=['pyinstrument', 'cprofile'], default=None)
+    args = parser.parse_args()
+
+    version = version_codigo()
+    if args.instrumentacion:
+        instrumentacion.configurar(os.path.abspath(args.instrumentacion), args.perfil, ejecucion=f"benchmark-{version}-{datetime.now():%Y%m%d-%H%M%S}")
+    for escala in args.escalas:
+        ruta_datos, generacion = preparar_datos(args.trabajo, escala)
+        registros = [generacion] if generacion else []
+        registros += ejecutar_escala(ruta_datos, os.path.join(args.trabajo, f"trabajo_{escala}"), args.modelo,
+                                     args.etapas, args.folds, args.detallado)
+
+        fecha = datetime.now().isoformat(timespec='seconds')
+        for r in registros:
+            r.update({'fecha': fecha, 'version': version, 'escala': escala, 'modelo': args.modelo, 'cpus': os.cpu_count(),
+                      'filas_por_segundo': r['filas'] / r['segundos'] if r['segundos'] > 0 else None})
+        comparar_con_anteriores(registros, args.resultados, args.umbral)
+        with open(args.resultados, 'a', encoding='utf-8') as f:
+            for r in registros:
+                f.write(json.dumps(r, ensure_ascii=False) + '\n')
+
+        print(f"\n--- {escala} alumnos ({args.modelo}) ---")
+        for r in registros:
+            relacion = f" (x{r['relacion_anterior']:.2f} vs. anterior)" if r.get('relacion_anterior') else ''
+            print(f"{r['etapa']:<14} {r['segundos']:>9.2f} s  {r['filas']:>10} filas{relacion}")
+    print(f"\nResultados agregados a '{args.resultados}'.")
@@ -0,0 +1,145 @@
+import os
+import argparse
+import pandas as pd
+
+# Calendario conocido cuando no hay BD ni 'calendario.csv' en el árbol de exportación
+PERIOD_ORDER = [35, 36, 40, 39, 42, 43, 41, 46, 47, 44, 49, 50, 48, 53, 54, 51, 52, 56, 55, 58, 59, 57, 61]
+PERIOD_ORDER_NAME = [
+    "2017-2018A", "2017-2018B", "2017-2018V", "2018-2019A", "2018-2019B", "2018-2019V",
+    "2019-2020A", "2019-2020B", "2019-2020V", "2020-2021A", "2020-2021B", "2020-2021V",
+    "2021-2022A", "2021-2022B", "2021-2022V", "2022-2023A", "2022-2023B", "2022-2023V",
+    "2023-2024A", "2023-2024B", "2023-2024V", "2024-2025A", "2024-2025B"
+]
+# Historial completo de id_periodo en orden cronológico; los anteriores a PERIOD_ORDER no tienen nombre conocido
+HISTORIAL_PERIODOS = [45, 15, 16, 17, 18, 12, 19, 13, 14, 2, 4, 3, 5, 6, 7, 8, 9, 10, 11, 20, 21, 22, 1, 24, 26, 23, 25, 28, 27, 30, 31, 29,
+                      33, 34, 32, 37, 38, 35, 36, 40, 39, 42, 43, 41, 46, 47, 44, 49, 50, 48, 53, 54, 51, 52, 56, 55, 58, 59, 57, 61, 60]
+TIPOS_PERIODO = ['A', 'B', 'V']
+ARCHIVO_CALENDARIO = 'calendario.csv'
+
+# Se asume que la BD NES tiene una tabla de periodos con el nombre escolar ('2017-2018A')
+# y la fecha de inicio, que da el orden cronológico (los id_periodo no son cronológicos).
+# Si el esquema real es distinto, se pasa otra consulta que devuelva (id_periodo, periodo) en orden
+CALENDARIO_QUERY = "SELECT id_periodo, periodo FROM nes_periodos ORDER BY fecha_inicio, id_periodo;"
+
+
+class Calendario:
+    """
+    Orden cronológico de los periodos con su nombre y tipo (A, B o V, la última letra
+    del nombre), con búsquedas por diccionario en lugar de recorrer las listas.
+
+    Args:
+        period_order (list): id_periodo con nombre, en orden cronológico.
+        period_order_name (list): Nombre de cada periodo en period_order.
+        historial (list): Todos los id_periodo en orden cronológico, incluidos los que no
+                          tienen nombre (por defecto, period_order).
+        origen (str): 'bd' si se leyó de la BD, 'por_defecto' si son las listas de este módulo
+                      o 'sintetico' si es el de un árbol de datosSinteticos.py.
+    """
+
+    def __init__(self, period_order, period_order_name, historial=None, origen='bd'):
+        self.period_order = [int(p) for p in period_order]
+        self.period_order_name = [str(n) for n in period_order_name]
+        self.historial = [int(p) for p in historial] if historial is not None else list(self.period_order)
+        self.origen = origen
+        self.posicion = {p: i for i, p in enumerate(self.period_order)}
+        self.nombres = dict(zip(self.period_order, self.period_order_name))
+
+    def indice(self, id_periodo):
+        """Posición cronológica del periodo (-1 si no está en el calendario)."""
+        return self.posicion.get(id_periodo, -1)
+
+    def tipo(self, id_periodo):
+        """'A', 'B' o 'V' (None si el periodo no está en el calendario)."""
+        nombre = self.nombres.get(id_periodo)
+        return nombre[-1] if nombre else None
+
+    def codigo_tipo(self, id_periodo):
+        """Posición del tipo en TIPOS_PERIODO (-1 si se desconoce)."""
+        tipo = self.tipo(id_periodo)
+        return TIPOS_PERIODO.index(tipo) if tipo in TIPOS_PERIODO else -1
+
+    def a_dataframe(self):
+        """Una fila por periodo del historial; los que no tienen nombre llevan 'periodo' vacío e 'indice' -1."""
+        return pd.DataFrame({
+            'id_periodo': self.historial,
+            'periodo': [self.nombres.get(p, '') for p in self.historial],
+            'indice': [self.indice(p) for p in self.historial],
+            'tipo_periodo': [self.codigo_tipo(p) for p in self.historial],
+            'origen': self.origen,
+        })
+
+    def __len__(self):
+        return len(self.period_order)
+
+
+def calendario_por_defecto():
+    """Calendario de PERIOD_ORDER, PERIOD_ORDER_NAME y HISTORIAL_PERIODOS, para cuando no hay BD ni 'calendario.csv'."""
+    return Calendario(PERIOD_ORDER, PERIOD_ORDER_NAME, HISTORIAL_PERIODOS, origen='por_defecto')
+
+
+def leer_calendario_bd(conn, query=CALENDARIO_QUERY):
+    """
+    Lee el calendario de la BD.
+
+    Args:
+        conn: Conexión abierta a la BD.
+        query (str): Consulta que devuelve (id_periodo, periodo) en orden cronológico.
+
+    Returns:
+        Calendario, o None si la consulta falla o no devuelve periodos.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        filas = cursor.fetchall()
+    except Exception as e:
+        print(f"ADVERTENCIA: No se pudo leer el calendario de la BD ({e}); se usa el calendario por defecto.")
+        # En PostgreSQL la transacción queda abortada tras un error
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+    if not filas:
+        print("ADVERTENCIA: La consulta del calendario no devolvió periodos; se usa el calendario por defecto.")
+        return None
+    return Calendario([id_periodo for id_periodo, _ in filas], [nombre for _, nombre in filas])
+
+
+def guardar_calendario(calendario, ruta_datos):
+    """Guarda el calendario como 'calendario.csv' en la raíz del árbol de exportación."""
+    calendario.a_dataframe().to_csv(os.path.join(ruta_datos, ARCHIVO_CALENDARIO), index=False, encoding='utf-8')
+
+
+def cargar_calendario(ruta_datos=None):
+    """
+    Calendario del árbol de exportación ('calendario.csv', que escribe obtenerCSV.py a partir
+    de la BD); si el árbol no lo tiene, el calendario por defecto. La columna 'origen' del
+    archivo indica si obtenerCSV.py tuvo que usar el calendario por defecto.
+    """
+    ruta = os.path.join(ruta_datos, ARCHIVO_CALENDARIO) if ruta_datos else None
+    if ruta and os.path.exists(ruta):
+        df = pd.read_csv(ruta, keep_default_na=False)
+        con_nombre = df[df['indice'] >= 0].sort_values('indice')
+        origen = df['origen'].iloc[0] if 'origen' in df.columns and len(df) else 'bd'
+        return Calendario(con_nombre['id_periodo'].tolist(), con_nombre['periodo'].tolist(), df['id_periodo'].tolist(), origen)
+    return calendario_por_defecto()
+
+
+if __name__ == '__main__':
+    from baseDatosNES import obtener_backend
+
+    parser = argparse.ArgumentParser(description="Muestra el calendario de periodos de la BD (o el del árbol de exportación).")
+    parser.add_argument('--backend', default=None, help="'postgres', 'postgres://...' o 'sqlite:///ruta'.")
+    parser.add_argument('--datos', default=None, help="Árbol de exportación con 'calendario.csv'.")
+    parser.add_argument('--consulta', default=CALENDARIO_QUERY, help="Consulta que devuelve (id_periodo, periodo) en orden cronológico.")
+    args = parser.parse_args()
+
+    calendario = None
+    if args.backend:
+        conn = obtener_backend(args.backend).conectar()
+        try:
+            calendario = leer_calendario_bd(conn, args.consulta)
+        finally:
+            conn.close()
+    calendario = calendario or cargar_calendario(args.datos)
+    print(calendario.a_dataframe().to_string(index=False))
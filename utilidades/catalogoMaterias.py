@@ -0,0 +1,123 @@
+import os
+import re
+import argparse
+import pandas as pd
+import numpy as np
+
+from taxonomias import RUTA_TAXONOMIAS, cargar_taxonomia, clasificar_con_taxonomias, normalizar_unicos
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def construir_catalogo(materias, taxonomia=None):
+    """
+    Asigna un id canónico a cada materia a partir de su nombre normalizado (sin acentos,
+    signos ni espacios repetidos), de modo que todos los id_materia de una misma materia
+    en distintos grupos y periodos comparten id.
+
+    Args:
+        materias (DataFrame): Debe tener 'id_materia' y 'materia' (materias_sin_clasificacion.csv).
+        taxonomia (Taxonomia): Taxonomía para la categoría (por defecto, mapeo_materias.json).
+
+    Returns:
+        (catalogo, indice): catalogo con una fila por id_canonico ('materia_normalizada',
+        'materia' más frecuente, 'categoria', 'num_ids') e indice con
+        'id_materia' -> 'id_canonico' -> 'categoria'.
+    """
+    if taxonomia is None:
+        taxonomia = cargar_taxonomia(os.path.join(RUTA_TAXONOMIAS, 'mapeo_materias.json'))
+    materias = materias[['id_materia', 'materia']].drop_duplicates('id_materia').reset_index(drop=True)
+
+    codigos, normalizados = normalizar_unicos(materias['materia'])
+    canonicos = np.array([_ESPACIOS.sub(' ', texto) for texto in normalizados['alfanumerica']], dtype=object)
+    # Los ids canónicos siguen el orden alfabético del nombre normalizado para que sean estables entre ejecuciones
+    nombres_canonicos, canonico_por_unico = np.unique(canonicos, return_inverse=True)
+
+    indice = pd.DataFrame({
+        'id_materia': materias['id_materia'].to_numpy(),
+        'id_canonico': canonico_por_unico[codigos].astype(np.int32),
+        'materia': materias['materia'].to_numpy(),
+        'categoria': clasificar_con_taxonomias(materias['materia'], [taxonomia])[taxonomia.nombre].to_numpy(),
+    })
+
+    # Si variantes del mismo nombre caen en categorías distintas, gana la más frecuente
+    frecuencias = indice.groupby(['id_canonico', 'categoria']).size().rename('n').reset_index()
+    categoria_canonica = frecuencias.sort_values(['id_canonico', 'n'], ascending=[True, False]).drop_duplicates('id_canonico')
+    representante = indice.groupby(['id_canonico', 'materia']).size().rename('n').reset_index()
+    representante = representante.sort_values(['id_canonico', 'n'], ascending=[True, False]).drop_duplicates('id_canonico')
+
+    catalogo = pd.DataFrame({'id_canonico': np.arange(len(nombres_canonicos), dtype=np.int32), 'materia_normalizada': nombres_canonicos})
+    catalogo = catalogo.merge(representante[['id_canonico', 'materia']], on='id_canonico')
+    catalogo = catalogo.merge(categoria_canonica[['id_canonico', 'categoria']], on='id_canonico')
+    catalogo['num_ids'] = indice['id_canonico'].value_counts().reindex(catalogo['id_canonico']).to_numpy()
+
+    indice = indice.drop(columns=['materia', 'categoria']).merge(catalogo[['id_canonico', 'categoria']], on='id_canonico')
+    return catalogo, indice.sort_values('id_materia').reset_index(drop=True)
+
+
+class IndiceMaterias:
+    """
+    Índice compacto id_materia -> id_canonico -> categoria para aplicar en los cargadores
+    con búsquedas por arreglo en lugar de joins.
+
+    Args:
+        indice (DataFrame): Salida de construir_catalogo (o indice_materias.csv).
+        catalogo (DataFrame): Catálogo con 'id_canonico' y 'categoria'.
+    """
+
+    def __init__(self, indice, catalogo):
+        ids = indice['id_materia'].to_numpy(dtype=np.int64)
+        self.canonico_por_id = np.full(ids.max() + 1 if len(ids) else 0, -1, dtype=np.int32)
+        self.canonico_por_id[ids] = indice['id_canonico'].to_numpy(dtype=np.int32)
+
+        catalogo = catalogo.sort_values('id_canonico')
+        codigos, self.categorias = pd.factorize(catalogo['categoria'])
+        self.categoria_por_canonico = np.full(catalogo['id_canonico'].max() + 1, -1, dtype=np.int16)
+        self.categoria_por_canonico[catalogo['id_canonico'].to_numpy()] = codigos
+        self.materias = catalogo.set_index('id_canonico')['materia']
+
+    def canonico(self, ids_materia):
+        """Devuelve el id canónico de cada id_materia (-1 si no está en el catálogo)."""
+        ids = np.asarray(ids_materia, dtype=np.int64)
+        conocidos = (ids >= 0) & (ids < len(self.canonico_por_id))
+        resultado = np.full(ids.shape, -1, dtype=np.int32)
+        resultado[conocidos] = self.canonico_por_id[ids[conocidos]]
+        return resultado
+
+    def codigo_categoria(self, ids_materia):
+        """Devuelve el código de categoría (índice en self.categorias, -1 si se desconoce)."""
+        canonicos = self.canonico(ids_materia)
+        return np.where(canonicos >= 0, self.categoria_por_canonico[canonicos], -1)
+
+    def categoria(self, ids_materia):
+        """Devuelve el nombre de la categoría de cada id_materia (None si se desconoce)."""
+        codigos = self.codigo_categoria(ids_materia)
+        nombres = np.append(np.asarray(self.categorias, dtype=object), None)
+        return nombres[codigos]
+
+
+def cargar_indice(carpeta='.'):
+    """Carga 'indice_materias.csv' y 'catalogo_materias.csv' de una carpeta como IndiceMaterias."""
+    indice = pd.read_csv(os.path.join(carpeta, 'indice_materias.csv'))
+    catalogo = pd.read_csv(os.path.join(carpeta, 'catalogo_materias.csv'))
+    return IndiceMaterias(indice, catalogo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Construye el catálogo canónico de materias y el índice id_materia -> id_canonico -> categoria.")
+    parser.add_argument('--entrada', default='./sql/materias_sin_clasificacion.csv')
+    parser.add_argument('--salida', default='.', help="Carpeta donde se escriben catalogo_materias.csv e indice_materias.csv.")
+    parser.add_argument('--taxonomia', default=os.path.join(RUTA_TAXONOMIAS, 'mapeo_materias.json'))
+    args = parser.parse_args()
+
+    try:
+        materias = pd.read_csv(args.entrada)
+        catalogo, indice = construir_catalogo(materias, cargar_taxonomia(args.taxonomia))
+        catalogo.to_csv(os.path.join(args.salida, 'catalogo_materias.csv'), index=False, encoding='utf-8')
+        indice.to_csv(os.path.join(args.salida, 'indice_materias.csv'), index=False, encoding='utf-8')
+
+        print(f"{len(indice)} id_materia agrupados en {len(catalogo)} materias canónicas.")
+        print("\nMaterias con más id_materia:")
+        print(catalogo.sort_values('num_ids', ascending=False)[['materia', 'num_ids', 'categoria']].head(10).to_string(index=False))
+    except FileNotFoundError as e:
+        print(f"ERROR: No se encontró el archivo: {e}")
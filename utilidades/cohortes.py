@@ -0,0 +1,170 @@
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+
+from particiones import listar_particiones
+from calendario import cargar_calendario
+
+
+def leer_matriculas(ruta):
+    """Lee solo 'matricula_hash' de una partición y devuelve las matrículas distintas."""
+    try:
+        df = pd.read_csv(ruta, usecols=lambda c: c == 'matricula_hash')
+    except Exception as e:
+        print(f"Error al cargar {ruta}: {e}")
+        return np.array([], dtype=object)
+    if 'matricula_hash' not in df.columns:
+        return np.array([], dtype=object)
+    return df['matricula_hash'].dropna().unique()
+
+
+def cargar_presencias(ruta_datos, all_period_order=None, procesos=None):
+    """
+    Construye la tabla de presencias: una fila por alumno, periodo, carrera y semestre en
+    que aparece, con enteros en lugar de hashes.
+
+    Args:
+        ruta_datos (str): Carpeta con las carpetas 'Periodo_<num>'.
+        all_period_order (list): Orden cronológico de todos los periodos del historial
+                                 (por defecto, el historial del calendario del árbol).
+        procesos (int): Procesos para leer las particiones (por defecto, uno por núcleo).
+
+    Returns:
+        (presencias, matriculas, carreras): presencias es un dict de arreglos 'alumno',
+        'periodo' (posición en all_period_order), 'carrera' (código) y 'semestre';
+        matriculas[alumno] y carreras[carrera] traducen los códigos de vuelta.
+    """
+    if all_period_order is None:
+        all_period_order = cargar_calendario(ruta_datos).historial
+    particiones = listar_particiones(ruta_datos)
+    posicion = {p_id: i for i, p_id in enumerate(all_period_order)}
+    fuera_de_orden = sorted(set(particiones['periodo']) - set(posicion))
+    if fuera_de_orden:
+        print(f"ADVERTENCIA: Periodos sin posición en all_period_order (se omiten): {fuera_de_orden}")
+        particiones = particiones[particiones['periodo'].isin(posicion)].reset_index(drop=True)
+
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        matriculas_por_particion = list(executor.map(leer_matriculas, particiones['ruta'], chunksize=max(1, len(particiones) // 64)))
+
+    tamanos = np.array([len(m) for m in matriculas_por_particion], dtype=np.int64)
+    todas = np.concatenate(matriculas_por_particion) if len(matriculas_por_particion) else np.array([], dtype=object)
+    alumnos, matriculas = pd.factorize(todas)
+    codigos_carrera, carreras = pd.factorize(particiones['carrera'], sort=True)
+
+    presencias = {
+        'alumno': alumnos.astype(np.int64),
+        'periodo': np.repeat(particiones['periodo'].map(posicion).to_numpy(dtype=np.int64), tamanos),
+        'carrera': np.repeat(codigos_carrera.astype(np.int64), tamanos),
+        'semestre': np.repeat(particiones['semestre'].to_numpy(dtype=np.int64), tamanos),
+    }
+    return presencias, np.asarray(matriculas), np.asarray(carreras)
+
+
+def asignar_cohortes(presencias, num_carreras):
+    """
+    Asigna a cada par (alumno, carrera) su generación: el primer periodo en que aparece
+    en primer semestre de esa carrera. Los alumnos que nunca aparecen en primer semestre
+    (ingresaron antes del historial o por revalidación) no pertenecen a ninguna generación.
+
+    Returns:
+        (claves, cohortes): arreglos ordenados por clave = alumno * num_carreras + carrera.
+    """
+    primer_semestre = presencias['semestre'] == 1
+    claves = presencias['alumno'][primer_semestre] * num_carreras + presencias['carrera'][primer_semestre]
+    periodos = presencias['periodo'][primer_semestre]
+    orden = np.lexsort((periodos, claves))
+    claves, primeros = np.unique(claves[orden], return_index=True)
+    return claves, periodos[orden][primeros]
+
+
+def matriz_alcance(presencias, num_carreras, num_periodos, max_semestre=None):
+    """
+    Cuenta cuántos alumnos de cada generación y carrera llegan (aparecen al menos una vez)
+    a cada semestre, con operaciones sobre arreglos ordenados de enteros.
+
+    Returns:
+        Arreglo [generación (posición del periodo) x carrera x semestre]; el semestre 1 es
+        el tamaño de la generación.
+    """
+    if max_semestre is None:
+        max_semestre = int(presencias['semestre'].max()) if len(presencias['semestre']) else 0
+    num_semestres = max_semestre + 1
+    claves_cohorte, cohortes = asignar_cohortes(presencias, num_carreras)
+
+    # Conjunto (alumno, carrera, semestre) sin repetidos: un alumno que recursa un semestre cuenta una vez
+    en_rango = presencias['semestre'] <= max_semestre
+    clave_alumno = presencias['alumno'][en_rango] * num_carreras + presencias['carrera'][en_rango]
+    alcanzados = np.unique(clave_alumno * num_semestres + presencias['semestre'][en_rango])
+    clave_alumno, semestres = np.divmod(alcanzados, num_semestres)
+
+    # Búsqueda binaria de cada (alumno, carrera) en las claves ordenadas de las generaciones
+    if len(claves_cohorte):
+        posiciones = np.minimum(np.searchsorted(claves_cohorte, clave_alumno), len(claves_cohorte) - 1)
+        con_cohorte = claves_cohorte[posiciones] == clave_alumno
+    else:
+        posiciones = np.zeros(len(clave_alumno), dtype=np.int64)
+        con_cohorte = np.zeros(len(clave_alumno), dtype=bool)
+
+    carreras = clave_alumno[con_cohorte] % num_carreras
+    celdas = (cohortes[posiciones[con_cohorte]] * num_carreras + carreras) * num_semestres + semestres[con_cohorte]
+    conteos = np.bincount(celdas, minlength=num_periodos * num_carreras * num_semestres)
+    return conteos.reshape(num_periodos, num_carreras, num_semestres)
+
+
+def curvas_retencion(alcance, carreras, all_period_order, period_map=None):
+    """
+    Convierte la matriz de alcance en curvas de retención (una por generación y carrera).
+    Las generaciones sin nombre en period_map se llaman 'Periodo <id>'.
+
+    Returns:
+        DataFrame con 'Cohorte_ID', 'Cohorte_Nombre', 'Carrera_ID', 'Semestre',
+        'Alumnos_Cohorte', 'Alumnos_Alcanzan' y 'Retencion' (%).
+    """
+    period_map = period_map or {}
+    num_periodos, num_carreras, num_semestres = alcance.shape
+    cohorte, carrera, semestre = np.meshgrid(np.arange(num_periodos), np.arange(num_carreras), np.arange(1, num_semestres), indexing='ij')
+    tamano = np.broadcast_to(alcance[:, :, 1:2], cohorte.shape)
+
+    curvas = pd.DataFrame({
+        'Cohorte_ID': np.asarray(all_period_order)[cohorte.ravel()],
+        'Carrera_ID': carreras[carrera.ravel()],
+        'Semestre': semestre.ravel(),
+        'Alumnos_Cohorte': tamano.ravel(),
+        'Alumnos_Alcanzan': alcance[:, :, 1:].ravel(),
+    })
+    curvas = curvas[curvas['Alumnos_Cohorte'] > 0].reset_index(drop=True)
+    curvas.insert(1, 'Cohorte_Nombre', curvas['Cohorte_ID'].map(lambda p: period_map.get(p, f"Periodo {p}")))
+    curvas['Retencion'] = curvas['Alumnos_Alcanzan'] / curvas['Alumnos_Cohorte'] * 100
+    return curvas
+
+
+def analizar_cohortes(ruta_datos, all_period_order=None, period_map=None, max_semestre=None, procesos=None):
+    """
+    Calcula en una sola pasada las curvas de retención de todas las generaciones y carreras
+    del historial completo (all_period_order; por defecto, el del calendario del árbol).
+    """
+    if all_period_order is None or period_map is None:
+        calendario = cargar_calendario(ruta_datos)
+        all_period_order = calendario.historial if all_period_order is None else all_period_order
+        period_map = calendario.nombres if period_map is None else period_map
+    presencias, matriculas, carreras = cargar_presencias(ruta_datos, all_period_order, procesos)
+    alcance = matriz_alcance(presencias, len(carreras), len(all_period_order), max_semestre)
+    return curvas_retencion(alcance, carreras, all_period_order, period_map)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Curvas de retención por generación y carrera (porcentaje que llega a cada semestre).")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's")
+    parser.add_argument('--salida', default='curvas_retencion.csv')
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.datos):
+        print(f"❌ ERROR: El directorio especificado '{args.datos}' no existe.")
+    else:
+        curvas = analizar_cohortes(args.datos, procesos=args.procesos)
+        curvas.to_csv(args.salida, index=False, encoding='utf-8')
+        print(f"Curvas guardadas en '{args.salida}': {curvas[['Cohorte_ID', 'Carrera_ID']].drop_duplicates().shape[0]} generaciones por carrera.")
+        print(curvas[curvas['Semestre'] == 10].groupby('Cohorte_Nombre', sort=False)[['Alumnos_Cohorte', 'Alumnos_Alcanzan']].sum())
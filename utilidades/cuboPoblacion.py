@@ -0,0 +1,126 @@
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+
+from particiones import listar_particiones, firma_particiones
+from calendario import cargar_calendario
+
+COLUMNAS_CUBO = ['Periodo_ID', 'Periodo_Nombre', 'Tipo_Periodo', 'Carrera_ID', 'Carrera_Nombre', 'Semestre', 'Num_Estudiantes']
+
+
+def contar_estudiantes(ruta):
+    """Cuenta las matrículas distintas de una partición leyendo solo 'matricula_hash' (-1 si no la tiene)."""
+    try:
+        df = pd.read_csv(ruta, usecols=lambda c: c == 'matricula_hash')
+    except Exception as e:
+        print(f"Error al cargar {ruta}: {e}")
+        return -1
+    if 'matricula_hash' not in df.columns:
+        return -1
+    return int(df['matricula_hash'].nunique())
+
+
+def construir_cubo(ruta_datos, period_order=None, period_order_name=None,
+                   ruta_cubo=None, procesos=None):
+    """
+    Construye el cubo de población: alumnos distintos por (periodo, tipo A/B/V, carrera, semestre).
+
+    Cada partición del árbol de CSV es una celda del cubo, así que las particiones se
+    cuentan en paralelo (un proceso por núcleo). Si existe `ruta_cubo`, solo se vuelven
+    a contar las particiones nuevas o modificadas y el resultado se guarda ahí.
+    Sin period_order se usa el calendario del árbol (cargar_calendario).
+
+    Returns:
+        DataFrame con COLUMNAS_CUBO (más 'firma', usada para la actualización incremental).
+    """
+    if period_order is None:
+        calendario = cargar_calendario(ruta_datos)
+        period_order, period_order_name = calendario.period_order, calendario.period_order_name
+    particiones = listar_particiones(ruta_datos)
+    particiones['firma'] = firma_particiones(particiones)
+
+    conteos = pd.Series(np.nan, index=particiones.index)
+    if ruta_cubo and os.path.exists(ruta_cubo):
+        anterior = pd.read_csv(ruta_cubo)
+        anterior = anterior.set_index(['Periodo_ID', 'Carrera_ID', 'Semestre', 'firma'])['Num_Estudiantes']
+        claves = pd.MultiIndex.from_frame(particiones[['periodo', 'carrera', 'semestre', 'firma']])
+        conteos[:] = anterior.reindex(claves).to_numpy()
+
+    pendientes = conteos.index[conteos.isna()]
+    if len(pendientes):
+        print(f"Contando {len(pendientes)} de {len(particiones)} particiones...")
+        rutas = particiones.loc[pendientes, 'ruta'].tolist()
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            conteos[pendientes] = list(executor.map(contar_estudiantes, rutas, chunksize=max(1, len(rutas) // 64)))
+
+    period_map = dict(zip(period_order, period_order_name))
+    cubo = pd.DataFrame({
+        'Periodo_ID': particiones['periodo'],
+        'Periodo_Nombre': particiones['periodo'].map(lambda p: period_map.get(p, f"Periodo {p}")),
+        'Tipo_Periodo': particiones['periodo'].map(lambda p: period_map[p][-1] if p in period_map else 'N/A'),
+        'Carrera_ID': particiones['carrera'],
+        'Carrera_Nombre': particiones['carrera'].map(lambda c: f"Carrera {c}"),
+        'Semestre': particiones['semestre'],
+        'Num_Estudiantes': conteos.astype(int),
+        'firma': particiones['firma'],
+    })
+    # Particiones sin 'matricula_hash' o ilegibles no forman parte del cubo
+    cubo = cubo[cubo['Num_Estudiantes'] >= 0].reset_index(drop=True)
+
+    if ruta_cubo:
+        cubo.to_csv(ruta_cubo, index=False, encoding='utf-8')
+    return cubo
+
+
+def cargar_cubo(ruta_cubo):
+    return pd.read_csv(ruta_cubo)
+
+
+def consultar_poblacion(cubo, period_order, semestre=None, tipo_periodo=None, carrera=None, c_names=None):
+    """
+    Consulta el cubo con los mismos resultados que analyze_population (si se da un
+    semestre) o get_full_exploratory_df (si no) de estadisticas2.ipynb.
+
+    Args:
+        cubo (DataFrame): Salida de construir_cubo o cargar_cubo.
+        period_order (list): Orden cronológico de los id_periodo, el del calendario del árbol con que
+                             se construyó el cubo; los periodos que no estén en él no se devuelven.
+        semestre (int): Semestre a consultar (None para todos).
+        tipo_periodo (str): 'A', 'B' o 'V' (None para todos).
+        carrera (int): id de carrera (None para todas).
+        c_names (dict): Nombres de carrera opcionales {id: nombre}.
+
+    Returns:
+        DataFrame con COLUMNAS_CUBO, en el orden cronológico de period_order.
+    """
+    seleccion = cubo['Periodo_ID'].isin(period_order)
+    if semestre is not None:
+        seleccion &= cubo['Semestre'] == semestre
+    if tipo_periodo is not None:
+        seleccion &= cubo['Tipo_Periodo'] == tipo_periodo
+    if carrera is not None:
+        seleccion &= cubo['Carrera_ID'] == carrera
+
+    resultado = cubo.loc[seleccion, COLUMNAS_CUBO].copy()
+    if c_names:
+        resultado['Carrera_Nombre'] = resultado['Carrera_ID'].map(lambda c: c_names.get(c, f"Carrera {c}"))
+    orden = {p_id: i for i, p_id in enumerate(period_order)}
+    resultado['_orden'] = resultado['Periodo_ID'].map(orden)
+    return resultado.sort_values(['_orden', 'Carrera_ID', 'Semestre']).drop(columns='_orden').reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Construye o actualiza el cubo de población por periodo, carrera y semestre.")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's")
+    parser.add_argument('--salida', default='cubo_poblacion.csv')
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.datos):
+        print(f"❌ ERROR: El directorio especificado '{args.datos}' no existe.")
+    else:
+        cubo = construir_cubo(args.datos, ruta_cubo=args.salida, procesos=args.procesos)
+        print(f"Cubo guardado en '{args.salida}' con {len(cubo)} celdas.")
+        print(cubo.groupby('Tipo_Periodo')['Num_Estudiantes'].sum())
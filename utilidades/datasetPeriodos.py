@@ -0,0 +1,144 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+import pandas as pd
+
+from particiones import listar_particiones
+from calendario import cargar_calendario
+
+
+class DatasetPeriodos(Mapping):
+    """
+    Reemplazo perezoso de load_period_csvs_into_vars con la misma estructura de claves:
+    dataset['p<periodo>']['p<periodo>c<carrera>s<semestre>'] es un DataFrame.
+
+    Solo se recorre el árbol de carpetas al crearlo; cada CSV se lee la primera vez que
+    se accede a él y se guarda en una caché LRU limitada por memoria, de modo que un
+    análisis que solo usa primer y décimo semestre no lee los demás archivos.
+
+    Args:
+        base_directory (str): La ruta base donde se encuentran las carpetas de 'Periodo_XX'.
+        max_memoria_mb (float): Memoria máxima de los DataFrames en caché.
+        columnas (list): Columnas a leer de cada CSV (todas si es None).
+        period_order (list): Orden cronológico de los id_periodo (por defecto, el calendario del árbol).
+        period_order_name (list): Nombre de cada periodo en period_order (define el tipo A, B o V).
+        omitir_invalidas (bool): No exponer las particiones marcadas como inválidas por perfilCalidad.py.
+    """
+
+    def __init__(self, base_directory, max_memoria_mb=1024, columnas=None,
+                 period_order=None, period_order_name=None, omitir_invalidas=True):
+        self.base_directory = base_directory
+        self.max_memoria = max_memoria_mb * 1024 * 1024
+        self.columnas = columnas
+        if period_order is None:
+            calendario = cargar_calendario(base_directory)
+            period_order, period_order_name = calendario.period_order, calendario.period_order_name
+        self.period_type = {id_p: name[-1] for id_p, name in zip(period_order, period_order_name)}
+
+        self.particiones = listar_particiones(base_directory, omitir_invalidas)
+        if self.particiones.empty:
+            print(f"No se encontraron datos de períodos en '{base_directory}'.")
+        self.particiones['clave'] = (
+            'p' + self.particiones['periodo'].astype(str) + 'c' + self.particiones['carrera'].astype(str)
+            + 's' + self.particiones['semestre'].astype(str)
+        )
+        self._rutas = dict(zip(self.particiones['clave'], self.particiones['ruta']))
+        self._periodos = {
+            f"p{periodo}": _VistaPeriodo(self, grupo['clave'].tolist())
+            for periodo, grupo in self.particiones.groupby('periodo', sort=False)
+        }
+
+        self._cache = OrderedDict()
+        self.memoria_en_uso = 0
+        self.lecturas = 0
+
+    def __getitem__(self, clave_periodo):
+        return self._periodos[clave_periodo]
+
+    def __iter__(self):
+        return iter(self._periodos)
+
+    def __len__(self):
+        return len(self._periodos)
+
+    def cargar(self, df_name):
+        """Devuelve el DataFrame de 'p<periodo>c<carrera>s<semestre>', leyéndolo si no está en caché."""
+        if df_name in self._cache:
+            self._cache.move_to_end(df_name)
+            return self._cache[df_name][0]
+
+        df = pd.read_csv(self._rutas[df_name], usecols=self._selector_columnas())
+        self.lecturas += 1
+        tamano = int(df.memory_usage(deep=True).sum())
+        self._cache[df_name] = (df, tamano)
+        self.memoria_en_uso += tamano
+
+        # Se descartan los menos usados recientemente; el recién leído siempre se conserva
+        while self.memoria_en_uso > self.max_memoria and len(self._cache) > 1:
+            _, (_, tamano_descartado) = self._cache.popitem(last=False)
+            self.memoria_en_uso -= tamano_descartado
+        return df
+
+    def _selector_columnas(self):
+        if self.columnas is None:
+            return None
+        columnas = set(self.columnas)
+        return lambda c: c in columnas
+
+    def seleccionar(self, tipo_periodo=None, carrera=None, semestre=None):
+        """
+        Filtra las particiones sin leerlas.
+
+        Args:
+            tipo_periodo (str): 'A', 'B' o 'V' (None para todos).
+            carrera (int | list): id(s) de carrera (None para todas).
+            semestre (int | list): Semestre(s) (None para todos).
+
+        Returns:
+            DataFrame de particiones ('periodo', 'carrera', 'semestre', 'clave', 'ruta', ...).
+        """
+        seleccion = pd.Series(True, index=self.particiones.index)
+        if tipo_periodo is not None:
+            seleccion &= self.particiones['periodo'].map(self.period_type) == tipo_periodo
+        if carrera is not None:
+            seleccion &= self.particiones['carrera'].isin(carrera if isinstance(carrera, (list, tuple, set)) else [carrera])
+        if semestre is not None:
+            seleccion &= self.particiones['semestre'].isin(semestre if isinstance(semestre, (list, tuple, set)) else [semestre])
+        return self.particiones[seleccion]
+
+    def iterar(self, tipo_periodo=None, carrera=None, semestre=None):
+        """
+        Recorre solo las particiones que cumplen el filtro, leyéndolas a medida que se piden.
+
+        Yields:
+            (periodo, carrera, semestre, DataFrame)
+        """
+        for particion in self.seleccionar(tipo_periodo, carrera, semestre).itertuples(index=False):
+            try:
+                df = self.cargar(particion.clave)
+            except Exception as e:
+                print(f"Error al cargar {particion.ruta}: {e}")
+                continue
+            yield particion.periodo, particion.carrera, particion.semestre, df
+
+    def limpiar_cache(self):
+        self._cache.clear()
+        self.memoria_en_uso = 0
+
+
+class _VistaPeriodo(Mapping):
+    """Vista de un periodo: {'p<periodo>c<carrera>s<semestre>': DataFrame} leída bajo demanda."""
+
+    def __init__(self, dataset, claves):
+        self._dataset = dataset
+        self._claves = dict.fromkeys(claves)
+
+    def __getitem__(self, df_name):
+        if df_name not in self._claves:
+            raise KeyError(df_name)
+        return self._dataset.cargar(df_name)
+
+    def __iter__(self):
+        return iter(self._claves)
+
+    def __len__(self):
+        return len(self._claves)
@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from statistics import NormalDist
+import pandas as pd
+import numpy as np
+
+from calendario import PERIOD_ORDER, PERIOD_ORDER_NAME, Calendario, guardar_calendario
+
+# Mismo orden de columnas que los CSV de obtenerCSV.py
+COLUMNAS_CSV = ['id_grupo', 'id_materia', 'p1', 'p2', 'p3', 'o', 'pf', 'e1', 'e2', 'esp', 'matricula_hash']
+# Carpeta con 'catalogo_materias.csv' e 'indice_materias.csv' (salida de catalogoMaterias.py)
+RUTA_CATALOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'materias y graduados')
+MATERIAS_BASE = [
+    "CÁLCULO DIFERENCIAL", "ÁLGEBRA LINEAL", "PROGRAMACIÓN ESTRUCTURADA", "FÍSICA I", "QUÍMICA GENERAL",
+    "INGLÉS I", "ESTADÍSTICA", "CONTABILIDAD FINANCIERA", "ADMINISTRACIÓN", "ÉTICA PROFESIONAL",
+    "BASES DE DATOS", "REDES DE COMPUTADORAS", "ELECTRÓNICA ANALÓGICA", "ECONOMÍA", "DERECHO MERCANTIL",
+]
+PRIMERA_MATRICULA = 20170000
+
+
+def catalogo_materias(carpeta_catalogo=RUTA_CATALOGO):
+    """
+    Materias canónicas del catálogo y sus id_materia reales, para que las materias sintéticas
+    se resuelvan con catalogoMaterias.cargar_indice igual que las de la BD. Sin el catálogo se
+    usa MATERIAS_BASE con un id_materia por materia.
+
+    Returns:
+        (nombres, ids, inicio, num_ids): nombre de cada materia canónica; los id_materia
+        ordenados por materia canónica, y la posición en `ids` donde empiezan los de cada
+        materia y cuántos son.
+    """
+    ruta_catalogo = os.path.join(carpeta_catalogo, 'catalogo_materias.csv')
+    ruta_indice = os.path.join(carpeta_catalogo, 'indice_materias.csv')
+    if not (os.path.exists(ruta_catalogo) and os.path.exists(ruta_indice)):
+        return list(MATERIAS_BASE), np.arange(1, len(MATERIAS_BASE) + 1), np.arange(len(MATERIAS_BASE)), np.ones(len(MATERIAS_BASE), dtype=np.int64)
+    indice = pd.read_csv(ruta_indice).sort_values(['id_canonico', 'id_materia'])
+    catalogo = pd.read_csv(ruta_catalogo).sort_values('id_canonico')
+    catalogo = catalogo[catalogo['id_canonico'].isin(indice['id_canonico']) & catalogo['materia'].notna()]
+    canonicos = indice['id_canonico'].to_numpy()
+    inicio = np.searchsorted(canonicos, catalogo['id_canonico'].to_numpy())
+    num_ids = np.searchsorted(canonicos, catalogo['id_canonico'].to_numpy(), side='right') - inicio
+    return catalogo['materia'].tolist(), indice['id_materia'].to_numpy(dtype=np.int64), inicio, num_ids
+
+
+def generar_periodos(num_alumnos=10000, num_carreras=5, materias_por_semestre=6, alumnos_por_grupo=35,
+                     tasa_reprobacion=0.15, tasa_centinela=0.05, tasa_fuera_rango=0.001,
+                     tasa_desercion=0.05, tasa_recursamiento=0.08, tasa_verano=0.10,
+                     period_order=PERIOD_ORDER, period_order_name=PERIOD_ORDER_NAME,
+                     semilla=0, carpeta_catalogo=RUTA_CATALOGO):
+    """
+    Simula la trayectoria de `num_alumnos` alumnos periodo por periodo y genera las tablas
+    de la BD NES (nes_grupos, nes_materias, nes_calificaciones) de cada periodo.
+
+    Cada alumno tiene una habilidad latente y una carrera. Entra en un periodo A (o B),
+    y en cada periodo regular puede desertar (más probable en los primeros semestres y
+    con menor habilidad), recursar el semestre o avanzar; al terminar el décimo semestre
+    deja de aparecer. Una parte de los alumnos ya estaba inscrita antes del primer
+    periodo del historial. En los periodos V solo una fracción cursa una materia.
+    Las calificaciones siguen las convenciones de la BD: -1 cuando no aplica o no se
+    capturó (e1/e2/esp solo existen si se reprobó la anterior) y algunos valores fuera
+    del rango 0-10. Las materias y sus id_materia salen del catálogo canónico
+    (catalogo_materias), así que muchos grupos comparten cada materia canónica.
+
+    Args:
+        num_alumnos (int): Alumnos simulados (de 10 mil a 1 millón).
+        tasa_reprobacion (float): Proporción aproximada de materias con pf < 6.
+        tasa_centinela (float): Proporción de calificaciones parciales no capturadas (-1).
+        tasa_fuera_rango (float): Proporción de calificaciones mayores a 10.
+        tasa_desercion (float): Probabilidad base de desertar en cada periodo regular.
+        tasa_recursamiento (float): Probabilidad base de repetir el semestre.
+        tasa_verano (float): Proporción de alumnos activos que cursan algo en los periodos V.
+        carpeta_catalogo (str): Carpeta con 'catalogo_materias.csv' e 'indice_materias.csv'.
+
+    Yields:
+        (id_periodo, {'nes_grupos': DataFrame, 'nes_materias': DataFrame, 'nes_calificaciones': DataFrame})
+    """
+    rng = np.random.default_rng(semilla)
+    materias, ids_catalogo, inicio_ids, num_ids = catalogo_materias(carpeta_catalogo)
+    dificultad = rng.normal(0, 0.5, len(materias))
+
+    carrera = rng.integers(1, num_carreras + 1, num_alumnos)
+    habilidad = rng.normal(0, 1, num_alumnos)
+    semestre = np.ones(num_alumnos, dtype=np.int64)
+
+    # Los alumnos entran en periodos A (o B, con menor peso); el 20% ya estaba inscrito antes del historial
+    tipos = np.array([nombre[-1] for nombre in period_order_name])
+    entradas = np.flatnonzero(tipos != 'V')
+    pesos = np.where(tipos[entradas] == 'A', 4.0, 1.0)
+    entrada = rng.choice(entradas, num_alumnos, p=pesos / pesos.sum())
+    previos = rng.random(num_alumnos) < 0.2
+    entrada[previos] = 0
+    semestre[previos] = rng.integers(2, 11, previos.sum())
+    activo = np.zeros(num_alumnos, dtype=bool)
+
+    # Con habilidad N(0,1), dificultad N(0,0.5) y ruido N(0,0.8), z ~ N(0, 1.375)
+    umbral = NormalDist().inv_cdf(tasa_reprobacion) * np.sqrt(1 + 0.25 + 0.64)
+    id_grupo = 1
+
+    for i, id_periodo in enumerate(period_order):
+        activo |= entrada == i
+        regular = tipos[i] != 'V'
+        if regular:
+            riesgo = tasa_desercion * np.where(semestre <= 2, 1.5, 1.0) * np.exp(-0.5 * habilidad)
+            activo &= ~((entrada < i) & (rng.random(num_alumnos) < riesgo))
+            alumnos = np.flatnonzero(activo)
+            semestres = semestre[alumnos]
+            num_materias = materias_por_semestre
+        else:
+            alumnos = np.flatnonzero(activo & (rng.random(num_alumnos) < tasa_verano))
+            semestres = np.maximum(semestre[alumnos] - 1, 1)
+            num_materias = 1
+        if len(alumnos) == 0:
+            continue
+
+        # Grupos: alumnos de la misma carrera y semestre repartidos al azar en grupos de alumnos_por_grupo
+        orden = np.lexsort((rng.random(len(alumnos)), semestres, carrera[alumnos]))
+        alumnos, semestres = alumnos[orden], semestres[orden]
+        clave = carrera[alumnos] * 100 + semestres
+        inicio_bloque = np.r_[0, np.flatnonzero(np.diff(clave)) + 1]
+        posicion = np.arange(len(alumnos)) - np.repeat(inicio_bloque, np.diff(np.r_[inicio_bloque, len(alumnos)]))
+        nuevo_grupo = (posicion % alumnos_por_grupo) == 0
+        grupo = id_grupo + np.cumsum(nuevo_grupo) - 1
+        primeros = np.flatnonzero(nuevo_grupo)
+        num_grupos = len(primeros)
+
+        nes_grupos = pd.DataFrame({
+            'id_grupo': grupo[primeros], 'id_periodo': id_periodo,
+            'id_carrera': carrera[alumnos[primeros]], 'semestre': semestres[primeros],
+        })
+        # Las materias de un grupo dependen de su carrera y semestre; cada grupo toma uno de los
+        # id_materia reales de la materia canónica, así que varios grupos comparten id y materia
+        ranura = np.tile(np.arange(num_materias), num_grupos)
+        indice_materia = ((np.repeat(nes_grupos['id_carrera'].to_numpy(), num_materias) * 97
+                           + np.repeat(nes_grupos['semestre'].to_numpy(), num_materias) * 13 + ranura * 7) % len(materias))
+        grupo_materia = np.repeat(nes_grupos['id_grupo'].to_numpy(), num_materias)
+        nes_materias = pd.DataFrame({
+            'id_materia': ids_catalogo[inicio_ids[indice_materia] + grupo_materia % num_ids[indice_materia]],
+            'id_grupo': grupo_materia,
+            'materia': np.asarray(materias, dtype=object)[indice_materia],
+        })
+
+        # Una fila por alumno y materia de su grupo
+        fila_alumno = np.repeat(np.arange(len(alumnos)), num_materias)
+        fila_materia = (grupo[fila_alumno] - id_grupo) * num_materias + np.tile(np.arange(num_materias), len(alumnos))
+        n = len(fila_alumno)
+        z = habilidad[alumnos[fila_alumno]] - dificultad[indice_materia[fila_materia]] + rng.normal(0, 0.8, n)
+        pf = np.clip(6 + (z - umbral) * 1.5, 0, 10)
+        calif = {
+            'p1': np.clip(pf + rng.normal(0, 0.8, n), 0, 10),
+            'p2': np.clip(pf + rng.normal(0, 0.8, n), 0, 10),
+            'p3': np.clip(pf + rng.normal(0, 0.8, n), 0, 10),
+            'o': np.clip(pf + rng.normal(0, 0.5, n), 0, 10),
+            'pf': pf,
+        }
+        calif = {col: np.round(valores, 1) for col, valores in calif.items()}
+        pf = calif['pf']
+        e1 = np.where(pf < 6, np.round(np.clip(pf + rng.normal(1.5, 1.5, n), 0, 10), 1), -1.0)
+        e2 = np.where((e1 >= 0) & (e1 < 6), np.round(np.clip(e1 + rng.normal(1.0, 1.5, n), 0, 10), 1), -1.0)
+        esp = np.where((e2 >= 0) & (e2 < 6), np.round(np.clip(e2 + rng.normal(1.0, 1.5, n), 0, 10), 1), -1.0)
+        calif.update({'e1': e1, 'e2': e2, 'esp': esp})
+        for col in ('p1', 'p2', 'p3', 'o'):
+            calif[col][rng.random(n) < tasa_centinela] = -1.0
+            fuera = rng.random(n) < tasa_fuera_rango
+            calif[col][fuera] = np.round(rng.uniform(10.1, 15, fuera.sum()), 1)
+
+        nes_calificaciones = pd.DataFrame({
+            'matricula': PRIMERA_MATRICULA + alumnos[fila_alumno],
+            'id_grupo': grupo[fila_alumno],
+            'id_materia': nes_materias['id_materia'].to_numpy()[fila_materia],
+            **calif,
+        })
+        yield id_periodo, {'nes_grupos': nes_grupos, 'nes_materias': nes_materias, 'nes_calificaciones': nes_calificaciones}
+
+        id_grupo += num_grupos
+        if regular:
+            # Quien reprueba la mayoría de sus materias tiene más probabilidad de recursar
+            reprobadas = np.bincount(fila_alumno, weights=pf < 6, minlength=len(alumnos)) / num_materias
+            recursa = rng.random(len(alumnos)) < tasa_recursamiento + 0.5 * (reprobadas > 0.5)
+            semestre[alumnos[~recursa]] += 1
+            activo[alumnos[semestre[alumnos] > 10]] = False
+
+
+def hash_matriculas(num_alumnos):
+    """SHA-256 de cada matrícula, igual que obtenerCSV.py."""
+    return np.array([hashlib.sha256(str(PRIMERA_MATRICULA + i).encode('utf-8')).hexdigest() for i in range(num_alumnos)], dtype=object)
+
+
+def escribir_arbol(ruta_salida, **config):
+    """
+    Escribe el árbol 'Periodo_X/Carrera_Y/periodoXcarreraYsemestreZ.csv' con las columnas
+    de obtenerCSV.py, su 'calendario.csv' y la configuración en 'parametros_sinteticos.json'.
+
+    Returns:
+        dict: Resumen con el número de particiones y filas escritas.
+    """
+    os.makedirs(ruta_salida, exist_ok=True)
+    calendario = Calendario(config.get('period_order', PERIOD_ORDER), config.get('period_order_name', PERIOD_ORDER_NAME), origen='sintetico')
+    guardar_calendario(calendario, ruta_salida)
+    hashes = hash_matriculas(config.get('num_alumnos', 10000))
+    particiones = filas = 0
+    for id_periodo, tablas in generar_periodos(**config):
+        calificaciones = tablas['nes_calificaciones'].merge(tablas['nes_grupos'][['id_grupo', 'id_carrera', 'semestre']], on='id_grupo')
+        calificaciones['matricula_hash'] = hashes[calificaciones['matricula'].to_numpy() - PRIMERA_MATRICULA]
+        for (id_carrera, semestre), df in calificaciones.groupby(['id_carrera', 'semestre']):
+            carpeta = os.path.join(ruta_salida, f"Periodo_{id_periodo}", f"Carrera_{id_carrera}")
+            os.makedirs(carpeta, exist_ok=True)
+            df[COLUMNAS_CSV].to_csv(os.path.join(carpeta, f"periodo{id_periodo}carrera{id_carrera}semestre{semestre}.csv"), index=False)
+            particiones += 1
+            filas += len(df)
+        print(f"  Periodo {id_periodo}: {len(calificaciones)} calificaciones.")
+
+    resumen = {'parametros': {k: v for k, v in config.items() if k not in ('period_order', 'period_order_name')},
+               'particiones': particiones, 'filas': filas}
+    with open(os.path.join(ruta_salida, 'parametros_sinteticos.json'), 'w', encoding='utf-8') as f:
+        json.dump(resumen, f, indent=2, sort_keys=True)
+    return resumen
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera un árbol de CSV sintético con la forma de la BD NES.")
+    parser.add_argument('salida', help="Carpeta donde se crean las carpetas Periodo_<num>.")
+    parser.add_argument('--alumnos', type=int, default=10000)
+    parser.add_argument('--carreras', type=int, default=5)
+    parser.add_argument('--reprobacion', type=float, default=0.15)
+    parser.add_argument('--centinela', type=float, default=0.05)
+    parser.add_argument('--desercion', type=float, default=0.05)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumen = escribir_arbol(args.salida, num_alumnos=args.alumnos, num_carreras=args.carreras, tasa_reprobacion=args.reprobacion,
+                             tasa_centinela=args.centinela, tasa_desercion=args.desercion, semilla=args.semilla)
+    print(f"Árbol sintético en '{args.salida}': {resumen['particiones']} particiones, {resumen['filas']} filas "
+          f"({time.perf_counter() - inicio:.1f} s).")
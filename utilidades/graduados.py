@@ -3,7 +3,59 @@ import re
 import pandas as pd
 from collections import defaultdict
 
-def analyze_student_graduation(root_directory):
+from instrumentacion import Medicion, instrumentar
+from particiones import particiones_invalidas
+from calendario import cargar_calendario
+
+@instrumentar('graduados_trayectorias', filas=len)
+def identify_graduated_students(student_progress, period_order, period_order_name):
+    """
+    Aplica las reglas de graduación sobre el progreso recopilado de cada alumno.
+
+    Args:
+        student_progress (dict): {matricula: {carrera: {semestre: primer_periodo}}}.
+        period_order (list): Orden cronológico de los id_periodo.
+        period_order_name (list): Nombre de cada periodo en period_order (termina en A, B o V).
+
+    Returns:
+        list: Matrículas de los alumnos identificados como graduados.
+    """
+    graduated_students = []
+    
+    MAX_REGULAR_PERIODS_ALLOWED = 10 + 4 # 10 periodos ideales + 2 años (4 periodos) de tolerancia
+
+    for student_hash, careers_data in student_progress.items():
+        for career_id, semester_data in careers_data.items():
+            
+            # Regla 1: ¿Completó todos los semestres del 1 al 10?
+            if set(semester_data.keys()).issuperset(set(range(1, 11))):
+                
+                try:
+                    start_period = semester_data[1]
+                    end_period = semester_data[10]
+
+                    start_index = period_order.index(start_period)
+                    end_index = period_order.index(end_period)
+                    
+                    if start_index > end_index: continue
+
+                    # Regla 2: ¿Terminó dentro de la tolerancia de tiempo?
+                    relevant_period_names = period_order_name[start_index : end_index + 1]
+                    regular_periods_count = sum(
+                        1 for name in relevant_period_names if name.endswith('A') or name.endswith('B')
+                    )
+
+                    if regular_periods_count <= MAX_REGULAR_PERIODS_ALLOWED:
+                        graduated_students.append(student_hash)
+                        break
+                
+                except (ValueError, KeyError) as e:
+                    print(f"ADVERTENCIA: Dato inconsistente para alumno {student_hash}. Error: {e}")
+
+    return graduated_students
+
+
+def analyze_student_graduation(root_directory, careers=None, output_file='graduados.txt'):
     """
     Analiza los registros de estudiantes para identificar a aquellos que han completado
     los 10 semestres de su carrera dentro de un plazo de tiempo tolerable,
@@ -11,15 +63,13 @@ def analyze_student_graduation(root_directory):
 
     Args:
         root_directory (str): La ruta al directorio que contiene las carpetas de los periodos.
+        careers (list): Analizar solo estas carreras (None = todas). La graduación se decide
+                        por carrera, así que el análisis se puede repartir por carrera.
+        output_file (str): Archivo donde se guarda la lista de graduados.
     """
     # --- CONFIGURACIÓN INICIAL ---
-    period_order = [35, 36, 40, 39, 42, 43, 41, 46, 47, 44, 49, 50, 48, 53, 54, 51, 52, 56, 55, 58, 59, 57, 61]
-    period_order_name = [
-        "2017-2018A", "2017-2018B", "2017-2018V", "2018-2019A", "2018-2019B", "2018-2019V",
-        "2019-2020A", "2019-2020B", "2019-2020V", "2020-2021A", "2020-2021B", "2020-2021V",
-        "2021-2022A", "2021-2022B", "2021-2022V", "2022-2023A", "2022-2023B", "2022-2023V",
-        "2023-2024A", "2023-2024B", "2023-2024V", "2024-2025A", "2024-2025B"
-    ]
+    calendario = cargar_calendario(root_directory)
+    period_order, period_order_name = calendario.period_order, calendario.period_order_name
     period_map = dict(zip(period_order, period_order_name))
 
     # Estructura para guardar el progreso: {matricula: {carrera: {semestre: primer_periodo}}}
@@ -32,8 +82,10 @@ def analyze_student_graduation(root_directory):
     file_pattern = re.compile(r'periodo(\d+)carrera(\d+)semestre(\d+)\.csv')
 
     print("Iniciando el procesamiento de archivos...")
+    invalid_partitions = particiones_invalidas(root_directory)
 
     # --- 1. RECOPILACIÓN DE DATOS ---
+    medicion = Medicion('graduados_recopilacion')
     for root, _, files in os.walk(root_directory):
         # Intentamos extraer el ID de la carrera desde la ruta de la carpeta actual
         career_match = career_folder_pattern.search(root)
@@ -41,11 +93,15 @@ def analyze_student_graduation(root_directory):
         # Solo procesamos archivos si estamos dentro de una carpeta 'Carrera_<numero>'
         if career_match:
             career_id = int(career_match.group(1))
+            if careers is not None and career_id not in careers:
+                continue
             
             for file in files:
                 if file.endswith('.csv'):
                     file_match = file_pattern.match(file)
                     if file_match:
+                        if tuple(int(g) for g in file_match.groups()) in invalid_partitions:
+                            continue
                         period_id = int(file_match.group(1))
                         semester = int(file_match.group(3))
                         
@@ -65,46 +121,16 @@ def analyze_student_graduation(root_directory):
                         except Exception as e:
                             print(f"Error al procesar el archivo {file_path}: {e}")
 
+    medicion.terminar(filas=len(student_progress))
     print("Procesamiento de archivos completado. Analizando trayectorias...")
 
     # --- 2. ANÁLISIS Y FILTRADO ---
-    graduated_students = []
-    
-    MAX_REGULAR_PERIODS_ALLOWED = 10 + 4 # 10 periodos ideales + 2 años (4 periodos) de tolerancia
-
-    for student_hash, careers_data in student_progress.items():
-        for career_id, semester_data in careers_data.items():
-            
-            # Regla 1: ¿Completó todos los semestres del 1 al 10?
-            if set(semester_data.keys()).issuperset(set(range(1, 11))):
-                
-                try:
-                    start_period = semester_data[1]
-                    end_period = semester_data[10]
-
-                    start_index = period_order.index(start_period)
-                    end_index = period_order.index(end_period)
-                    
-                    if start_index > end_index: continue
-
-                    # Regla 2: ¿Terminó dentro de la tolerancia de tiempo?
-                    relevant_period_names = period_order_name[start_index : end_index + 1]
-                    regular_periods_count = sum(
-                        1 for name in relevant_period_names if name.endswith('A') or name.endswith('B')
-                    )
-
-                    if regular_periods_count <= MAX_REGULAR_PERIODS_ALLOWED:
-                        graduated_students.append(student_hash)
-                        break
-                
-                except (ValueError, KeyError) as e:
-                    print(f"ADVERTENCIA: Dato inconsistente para alumno {student_hash}. Error: {e}")
+    graduated_students = identify_graduated_students(student_progress, period_order, period_order_name)
 
     # --- 3. RESULTADO FINAL ---
     print("\n--- Análisis Finalizado ---")
     print(f"✅ Total de alumnos identificados como graduados: {len(graduated_students)}")
 
-    output_file = 'graduados.txt'
     with open(output_file, 'w') as f:
         for student_hash in graduated_students:
             f.write(f"{student_hash}\n")
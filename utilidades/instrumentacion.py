@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configuración global; por defecto se toma de las variables de entorno para poder activar
+# la instrumentación en cualquier script sin cambiar su línea de comandos:
+#   INSTRUMENTACION=etapas.jsonl            archivo JSONL donde se agregan las mediciones
+#   INSTRUMENTACION_PERFIL=pyinstrument     perfilador por muestreo de las etapas de primer nivel (o 'cprofile')
+#   INSTRUMENTACION_EJECUCION=nocturna-01   identificador para agrupar las mediciones de una corrida
+_config = {
+    'ruta': os.environ.get('INSTRUMENTACION'),
+    'perfil': os.environ.get('INSTRUMENTACION_PERFIL'),
+    'ejecucion': os.environ.get('INSTRUMENTACION_EJECUCION') or f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}",
+    'intervalo_memoria': 0.05,
+}
+_pila = threading.local()
+_bloqueo = threading.Lock()
+
+
+def configurar(ruta=None, perfil=None, ejecucion=None, intervalo_memoria=None):
+    """
+    Activa la instrumentación desde código (equivale a las variables de entorno).
+
+    Args:
+        ruta (str): Archivo JSONL de salida (None la deja desactivada).
+        perfil (str): 'pyinstrument' (perfilador por muestreo) o 'cprofile'.
+        ejecucion (str): Identificador de la corrida.
+        intervalo_memoria (float): Segundos entre muestras de memoria durante cada etapa.
+    """
+    _config['ruta'] = ruta
+    _config['perfil'] = perfil
+    if ejecucion is not None:
+        _config['ejecucion'] = ejecucion
+    if intervalo_memoria is not None:
+        _config['intervalo_memoria'] = intervalo_memoria
+
+
+def activa():
+    return bool(_config['ruta'])
+
+
+def rss_actual(pid=None):
+    """Memoria residente del proceso actual (o del proceso `pid`) en bytes (None si no se puede medir)."""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _rss_pico_proceso():
+    """Máximo histórico de memoria residente del proceso en bytes."""
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', None)
+    return None
+
+
+class _MuestreadorMemoria(threading.Thread):
+    """Hilo que toma el máximo de la memoria residente mientras dura una etapa."""
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = rss_actual() or 0
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.wait(self.intervalo):
+            self.pico = max(self.pico, rss_actual() or 0)
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+        self.pico = max(self.pico, rss_actual() or 0)
+        return self.pico
+
+
+def _iniciar_perfil():
+    if _config['perfil'] == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("ADVERTENCIA: pyinstrument no está instalado; se usa cProfile para los perfiles.")
+            _config['perfil'] = 'cprofile'
+        else:
+            perfilador = Profiler()
+            perfilador.start()
+            return perfilador
+    if _config['perfil'] == 'cprofile':
+        import cProfile
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+        return perfilador
+    return None
+
+
+def _guardar_perfil(perfilador, nombre):
+    carpeta = os.path.splitext(_config['ruta'])[0] + '_perfiles'
+    os.makedirs(carpeta, exist_ok=True)
+    base = os.path.join(carpeta, f"{_config['ejecucion']}_{nombre}")
+    if _config['perfil'] == 'pyinstrument':
+        perfilador.stop()
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(perfilador.output_text(unicode=True))
+        return base + '.txt'
+    perfilador.disable()
+    perfilador.dump_stats(base + '.prof')
+    return base + '.prof'
+
+
+class Medicion:
+    """
+    Medición de una etapa: tiempo de reloj, tiempo de CPU, memoria residente máxima y
+    filas procesadas. Si la instrumentación está desactivada no mide nada.
+
+    Uso cuando la etapa no cabe en un bloque `with`:
+        medicion = Medicion('exportar_periodo', periodo=58)
+        ...
+        medicion.terminar(filas=n)
+    """
+
+    def __init__(self, nombre, **etiquetas):
+        self.nombre = nombre
+        self.registro = {'filas': None, **etiquetas}
+        self.terminada = not activa()
+        if self.terminada:
+            return
+        pila = getattr(_pila, 'etapas', None)
+        if pila is None:
+            pila = _pila.etapas = []
+        self.padre = pila[-1].nombre if pila else None
+        self.perfilador = _iniciar_perfil() if not pila else None  # Los perfiladores no se anidan
+        pila.append(self)
+        self.muestreador = _MuestreadorMemoria(_config['intervalo_memoria'])
+        self.muestreador.start()
+        self.inicio = time.perf_counter()
+        self.inicio_cpu = time.process_time()
+
+    def terminar(self, **valores):
+        if self.terminada:
+            return self.registro
+        self.terminada = True
+        segundos = time.perf_counter() - self.inicio
+        cpu = time.process_time() - self.inicio_cpu
+        pico = self.muestreador.detener()
+        pico_proceso = _rss_pico_proceso()
+        pila = _pila.etapas
+        if self in pila:
+            pila.remove(self)
+        self.registro.update(valores)
+
+        registro = {
+            'ejecucion': _config['ejecucion'],
+            'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+            'pid': os.getpid(),
+            'etapa': self.nombre,
+            'padre': self.padre,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'segundos': round(segundos, 4),
+            'cpu_segundos': round(cpu, 4),
+            'rss_pico_mb': round(pico / 2 ** 20, 1) if pico else None,
+            'rss_pico_proceso_mb': round(pico_proceso / 2 ** 20, 1) if pico_proceso else None,
+            **self.registro,
+        }
+        if registro['filas'] is not None and segundos > 0:
+            registro['filas_por_segundo'] = round(registro['filas'] / segundos, 1)
+        if self.perfilador is not None:
+            # Las etiquetas (fold, periodo...) distinguen los perfiles de una misma etapa
+            sufijo = ''.join(f"_{k}{v}" for k, v in self.registro.items() if k != 'filas' and isinstance(v, (int, str)))
+            registro['perfil'] = _guardar_perfil(self.perfilador, self.nombre + sufijo)
+
+        with _bloqueo, open(_config['ruta'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+        return registro
+
+
+@contextmanager
+def etapa(nombre, **etiquetas):
+    """
+    Mide un bloque de código. El diccionario que devuelve permite registrar las filas
+    (u otros valores) al terminar:
+
+        with etapa('fold', fold=3) as registro:
+            ...
+            registro['filas'] = len(X_train)
+    """
+    medicion = Medicion(nombre, **etiquetas)
+    try:
+        yield medicion.registro
+    except BaseException as e:
+        medicion.terminar(error=repr(e))
+        raise
+    else:
+        medicion.terminar()
+
+
+def instrumentar(nombre, filas=None):
+    """
+    Decorador que mide cada llamada a la función como una etapa.
+
+    Args:
+        nombre (str): Nombre de la etapa.
+        filas (callable): Función que recibe el resultado y devuelve el número de filas.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with etapa(nombre) as registro:
+                resultado = funcion(*args, **kwargs)
+                if filas is not None and activa():
+                    registro['filas'] = filas(resultado)
+                return resultado
+        return envoltura
+    return decorador
+
+
+def leer_mediciones(ruta):
+    """Carga un archivo JSONL de mediciones como DataFrame (para comparar corridas)."""
+    import pandas as pd
+    return pd.read_json(ruta, lines=True)
@@ -1,71 +1,34 @@
 import pandas as pd
-import numpy as np
-import re
-import unicodedata
+import os
 import warnings
 
+from taxonomias import RUTA_TAXONOMIAS, cargar_taxonomia, clasificar_con_taxonomias, normalize_text
+
 warnings.filterwarnings('ignore')
 
-def normalize_text(text):
-    """
-    Quita acentos y convierte a minúsculas para normalizar el texto.
-    """
-    if pd.isna(text):
-        return ""
-    text = str(text).lower()
-    text = unicodedata.normalize('NFD', text)
-    text = text.encode('ascii', 'ignore').decode('utf-8')
-    return text
+# La taxonomía (antes categorias_map) vive en taxonomias/mapeo_materias.json y se
+# compila una sola vez al importar el módulo.
+TAXONOMIA = cargar_taxonomia(os.path.join(RUTA_TAXONOMIAS, 'mapeo_materias.json'))
 
 def asignar_categoria(materia_nombre):
     """
     Asigna una categoría basada en palabras clave.
     """
-    categorias_map = {
-        'Ciencias Básicas (STEM)': [
-            'calculo', 'fisica', 'quimica', 'algebra', 'ecuaciones', 
-            'matematicas', 'probabilidad', 'estadistica', 'termodinamica',
-            'metodos numericos', 'geometria'
-        ],
-        'Computación y Software': [
-            'programacion', 'software', 'base de datos', 'redes', 'web', 
-            'sistemas', 'computacion', 'algoritmos', 'inteligencia artificial',
-            'sistemas operativos', 'graficacion', 'ciberseguridad', 
-            'arquitectura de computadoras', 'lenguajes y automatas', 
-            'sistemas programables', 'lenguajes de interfaz',
-            'estructura de datos', 'teoria general de sistemas', 'simulacion'
-        ],
-        'Economía y Administración': [
-            'contabilidad', 'finanzas', 'economia', 'administracion', 
-            'empresa', 'costos', 'mercadotecnia', 'proyectos', 'gestion',
-            'recursos humanos', 'taller de administracion', 
-            'formulacion y evaluacion de proyectos', 'ingenieria economica'
-        ],
-        'Ingeniería Aplicada': [
-            'electrica', 'electronica', 'circuitos', 'mecanica', 'industrial',
-            'dibujo', 'maquinas', 'control', 'telecomunicaciones', 'procesos',
-            'automatizacion', 'manufactura', 'instrumentacion', 'mecanismos',
-            'principios de electronica', 'ingenieria de control'
-        ],
-        'Formación General y Humanidades': [
-            'etica', 'investigacion', 'desarrollo sustentable', 'ingles', 
-            'comunicacion', 'expresion oral', 'humanidades', 'sociedad',
-            'cultura', 'taller de expresion', 'fundamentos de investigacion',
-            'comunicacion humana', 'desarrollo humano'
-        ]
-    }
-    
-    materia_normalized = normalize_text(materia_nombre)
-    
-    if not materia_normalized:
-        return 'Por Clasificar'
-    
-    for categoria, keywords in categorias_map.items():
-        for keyword in keywords:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', materia_normalized):
-                return categoria
-    
-    return 'Especialidad / Otra'
+    return TAXONOMIA.clasificar(normalize_text(materia_nombre))
+
+def clasificar_materias(nombres):
+    """
+    Clasifica una serie de nombres de materia. Cada nombre distinto se normaliza
+    una sola vez y cada nombre normalizado distinto se clasifica una sola vez; el
+    resultado se reparte a todas las filas que lo comparten.
+
+    Args:
+        nombres (pd.Series): Nombres de las materias.
+
+    Returns:
+        pd.Series: Categoría de cada fila, con el mismo índice que `nombres`.
+    """
+    return clasificar_con_taxonomias(nombres, [TAXONOMIA])[TAXONOMIA.nombre]
 
 if __name__ == '__main__':
     input_file = './sql/materias_sin_clasificacion.csv'
@@ -77,7 +40,7 @@ if __name__ == '__main__':
         
         if 'materia' in df.columns:
             print("Aplicando categorización...")
-            df['categoria'] = df['materia'].apply(asignar_categoria)
+            df['categoria'] = clasificar_materias(df['materia'])
             
             df_final_mapeo = df[['id_materia', 'categoria']].drop_duplicates().reset_index(drop=True)
             
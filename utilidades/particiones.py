@@ -0,0 +1,92 @@
+import os
+import re
+import pandas as pd
+
+FILE_PATTERN = re.compile(r'periodo(\d+)carrera(\d+)semestre(\d+)\.csv')
+
+
+def listar_particiones(ruta_datos, omitir_invalidas=False):
+    """
+    Recorre el árbol 'Periodo_<num>/Carrera_<num>/periodo<p>carrera<c>semestre<s>.csv'
+    sin leer ningún CSV.
+
+    Args:
+        ruta_datos (str): Carpeta que contiene las carpetas de los periodos.
+        omitir_invalidas (bool): Quitar las particiones inválidas según el perfil de calidad.
+
+    Returns:
+        DataFrame con 'periodo', 'carrera', 'semestre', 'ruta', 'tamano' y 'mtime_ns',
+        ordenado por periodo, carrera y semestre.
+    """
+    registros = []
+    for root, _, files in os.walk(ruta_datos):
+        for file in files:
+            match = FILE_PATTERN.match(file)
+            if match:
+                ruta = os.path.join(root, file)
+                info = os.stat(ruta)
+                periodo, carrera, semestre = (int(g) for g in match.groups())
+                registros.append((periodo, carrera, semestre, ruta, info.st_size, info.st_mtime_ns))
+
+    particiones = pd.DataFrame(registros, columns=['periodo', 'carrera', 'semestre', 'ruta', 'tamano', 'mtime_ns'])
+    if omitir_invalidas:
+        invalidas = particiones_invalidas(ruta_datos)
+        if invalidas:
+            claves = zip(particiones['periodo'], particiones['carrera'], particiones['semestre'])
+            particiones = particiones[[clave not in invalidas for clave in claves]]
+    return particiones.sort_values(['periodo', 'carrera', 'semestre']).reset_index(drop=True)
+
+
+def firma_particiones(particiones):
+    """Firma barata (tamaño y fecha de modificación) de cada partición para detectar cambios."""
+    return particiones['tamano'].astype(str) + ':' + particiones['mtime_ns'].astype(str)
+
+
+ARCHIVO_PERFIL = 'perfil_calidad.csv'
+
+
+def particiones_invalidas(ruta_datos, ruta_perfil=None):
+    """
+    Particiones que perfilCalidad.py marcó como inválidas (sin 'matricula_hash', ilegibles
+    o vacías) y que no han cambiado desde que se perfilaron; una partición modificada
+    después del perfil ya no se omite.
+
+    Args:
+        ruta_datos (str): Carpeta que contiene las carpetas de los periodos.
+        ruta_perfil (str): Perfil de calidad (por defecto, 'perfil_calidad.csv' dentro de ruta_datos).
+
+    Returns:
+        set de (periodo, carrera, semestre); vacío si no existe el perfil.
+    """
+    ruta_perfil = ruta_perfil or os.path.join(ruta_datos, ARCHIVO_PERFIL)
+    if not os.path.exists(ruta_perfil):
+        return set()
+    perfil = pd.read_csv(ruta_perfil, usecols=['periodo', 'carrera', 'semestre', 'ruta', 'firma', 'estado'])
+    invalidas = set()
+    for p in perfil[perfil['estado'] == 'invalida'].itertuples(index=False):
+        try:
+            info = os.stat(os.path.join(ruta_datos, p.ruta))
+        except OSError:
+            continue
+        if f"{info.st_size}:{info.st_mtime_ns}" == p.firma:
+            invalidas.add((p.periodo, p.carrera, p.semestre))
+    if invalidas:
+        print(f"Omitiendo {len(invalidas)} particiones marcadas como inválidas en '{ruta_perfil}'.")
+    return invalidas
+
+
+ARCHIVO_CATEGORIAS = 'categorias.csv'
+
+
+def cargar_categorias(ruta_datos):
+    """
+    Nombres de los códigos de la columna 'categoria' de una exportación desnormalizada
+    ('categorias.csv', que escribe obtenerCSV.PartitionCodes).
+
+    Returns:
+        list: categorias[codigo]; vacía si el árbol no tiene el archivo.
+    """
+    ruta = os.path.join(ruta_datos, ARCHIVO_CATEGORIAS)
+    if not os.path.exists(ruta):
+        return []
+    return pd.read_csv(ruta).sort_values('codigo')['categoria'].tolist()
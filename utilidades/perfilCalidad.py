@@ -0,0 +1,187 @@
+import os
+import argparse
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from particiones import listar_particiones, firma_particiones, ARCHIVO_PERFIL
+
+# Encabezado que escribe obtenerCSV.py
+COLUMNAS_ESPERADAS = ['id_grupo', 'id_materia', 'p1', 'p2', 'p3', 'o', 'pf', 'e1', 'e2', 'esp', 'matricula_hash']
+COLUMNAS_CALIFICACION = ['p1', 'p2', 'p3', 'o', 'pf', 'e1', 'e2', 'esp']
+CALIFICACION_MAXIMA = 10
+MEDIDAS = ['nulos', 'centinela', 'fuera_rango']
+
+
+def perfilar_particion(ruta, tam_bloque=100000):
+    """
+    Recorre un CSV una sola vez, por bloques de `tam_bloque` filas, y cuenta en cada columna
+    de calificación los nulos, los centinelas (negativos) y los valores fuera de rango
+    (mayores a CALIFICACION_MAXIMA). Solo las matrículas distintas se guardan completas,
+    así que la memoria no depende del número de filas del archivo.
+
+    Args:
+        ruta (str): CSV de la partición.
+        tam_bloque (int): Filas leídas por bloque.
+
+    Returns:
+        dict con 'filas', 'alumnos', 'esquema' (columnas en orden, separadas por comas),
+        los conteos '<columna>_<medida>', 'matricula_nulos', 'no_numericos' (valores de
+        texto en columnas de calificación) y 'error' (None si se pudo leer).
+    """
+    registro = {'filas': 0, 'alumnos': 0, 'esquema': '', 'matricula_nulos': 0, 'no_numericos': 0, 'error': None}
+    registro.update({f"{col}_{medida}": 0 for col in COLUMNAS_CALIFICACION for medida in MEDIDAS})
+    matriculas = set()
+    try:
+        columnas = pd.read_csv(ruta, nrows=0).columns.tolist()
+        registro['esquema'] = ','.join(columnas)
+        calificaciones = [col for col in COLUMNAS_CALIFICACION if col in columnas]
+        for bloque in pd.read_csv(ruta, chunksize=tam_bloque):
+            registro['filas'] += len(bloque)
+            if 'matricula_hash' in bloque.columns:
+                registro['matricula_nulos'] += int(bloque['matricula_hash'].isna().sum())
+                matriculas.update(bloque['matricula_hash'].dropna().unique())
+            for col in calificaciones:
+                valores = bloque[col]
+                if not pd.api.types.is_numeric_dtype(valores):
+                    texto = valores
+                    valores = pd.to_numeric(texto, errors='coerce')
+                    registro['no_numericos'] += int((valores.isna() & texto.notna()).sum())
+                registro[f"{col}_nulos"] += int(valores.isna().sum())
+                registro[f"{col}_centinela"] += int((valores < 0).sum())
+                registro[f"{col}_fuera_rango"] += int((valores > CALIFICACION_MAXIMA).sum())
+    except Exception as e:
+        registro['error'] = f"{type(e).__name__}: {e}"
+    registro['alumnos'] = len(matriculas)
+    return registro
+
+
+def clasificar(perfil, umbral_fuera_rango=0.05):
+    """
+    Asigna a cada partición 'estado' y 'motivo':
+    - 'invalida': ilegible, sin 'matricula_hash', vacía, sin ninguna matrícula o con texto
+      en columnas de calificación (la limpieza de negativos de los cargadores falla con
+      ellas). Los cargadores las omiten (particiones.particiones_invalidas).
+    - 'advertencia': esquema distinto del más común o más de `umbral_fuera_rango` de alguna
+      columna por encima de la calificación máxima.
+    - 'ok': lo demás. Los centinelas negativos son normales (calificación no aplicable).
+    """
+    columnas = perfil['esquema'].str.split(',')
+    esquema_comun = perfil.loc[perfil['error'].isna(), 'esquema'].mode()
+    perfil['deriva_esquema'] = perfil['error'].isna() & (perfil['esquema'] != (esquema_comun.iloc[0] if len(esquema_comun) else ''))
+    perfil['faltantes'] = columnas.map(lambda c: ','.join(col for col in COLUMNAS_ESPERADAS if col not in c))
+    perfil['extras'] = columnas.map(lambda c: ','.join(col for col in c if col and col not in COLUMNAS_ESPERADAS))
+
+    filas = perfil['filas'].where(perfil['filas'] > 0)
+    tasa_fuera_rango = perfil[[f"{col}_fuera_rango" for col in COLUMNAS_CALIFICACION]].max(axis=1) / filas
+    condiciones = {
+        'ilegible': perfil['error'].notna(),
+        'sin matricula_hash': perfil['error'].isna() & ~columnas.map(lambda c: 'matricula_hash' in c).astype(bool),
+        'vacia': perfil['error'].isna() & (perfil['filas'] == 0),
+        'matriculas nulas': (perfil['filas'] > 0) & (perfil['matricula_nulos'] == perfil['filas']),
+        'calificaciones no numericas': perfil['no_numericos'] > 0,
+    }
+    avisos = {
+        'deriva de esquema': perfil['deriva_esquema'],
+        'fuera de rango': tasa_fuera_rango > umbral_fuera_rango,
+    }
+    motivos = pd.DataFrame({**condiciones, **avisos})
+    perfil['motivo'] = motivos.apply(lambda fila: '; '.join(fila.index[fila.to_numpy(dtype=bool)]), axis=1) if len(perfil) else ''
+    perfil['estado'] = np.select([pd.DataFrame(condiciones).any(axis=1), pd.DataFrame(avisos).any(axis=1)],
+                                 ['invalida', 'advertencia'], 'ok')
+    return perfil
+
+
+def construir_perfil(ruta_datos, ruta_perfil=None, procesos=None, tam_bloque=100000, umbral_fuera_rango=0.05):
+    """
+    Perfila todas las particiones del árbol de CSV, en paralelo (un proceso por núcleo) y
+    leyendo cada archivo una sola vez. Si ya existe el perfil, solo se vuelven a leer las
+    particiones nuevas o modificadas (misma firma de tamaño y fecha que cuboPoblacion.py).
+
+    Args:
+        ruta_datos (str): Carpeta con las carpetas 'Periodo_<num>'.
+        ruta_perfil (str): Donde se guarda el perfil (por defecto, 'perfil_calidad.csv' en ruta_datos).
+        procesos (int): Procesos para leer las particiones.
+        tam_bloque (int): Filas leídas por bloque en cada partición.
+        umbral_fuera_rango (float): Proporción de valores fuera de rango que produce una advertencia.
+
+    Returns:
+        DataFrame con una fila por partición: 'periodo', 'carrera', 'semestre', 'ruta'
+        (relativa a ruta_datos), 'firma', los conteos de perfilar_particion, 'deriva_esquema',
+        'faltantes', 'extras', 'estado' y 'motivo'.
+    """
+    ruta_perfil = ruta_perfil or os.path.join(ruta_datos, ARCHIVO_PERFIL)
+    particiones = listar_particiones(ruta_datos)
+    particiones['firma'] = firma_particiones(particiones)
+    particiones['ruta_relativa'] = particiones['ruta'].map(lambda r: os.path.relpath(r, ruta_datos))
+
+    registros = [None] * len(particiones)
+    if os.path.exists(ruta_perfil):
+        anterior = pd.read_csv(ruta_perfil, keep_default_na=False, na_values={'error': ['']})
+        anterior = {(r['ruta'], r['firma']): r for r in anterior.to_dict('records')}
+        for i, clave in enumerate(zip(particiones['ruta_relativa'], particiones['firma'])):
+            registros[i] = anterior.get(clave)
+
+    pendientes = [i for i, r in enumerate(registros) if r is None]
+    if pendientes:
+        print(f"Perfilando {len(pendientes)} de {len(particiones)} particiones...")
+        rutas = particiones['ruta'].iloc[pendientes].tolist()
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            for i, registro in zip(pendientes, executor.map(perfilar_particion, rutas, repeat(tam_bloque),
+                                                             chunksize=max(1, len(rutas) // 64))):
+                registros[i] = registro
+
+    conteos = ['filas', 'alumnos', 'matricula_nulos', 'no_numericos',
+               *(f"{col}_{medida}" for col in COLUMNAS_CALIFICACION for medida in MEDIDAS)]
+    perfil = pd.DataFrame(registros, columns=['esquema', 'error', *conteos], index=particiones.index)
+    perfil['error'] = perfil['error'].replace('', np.nan)
+    perfil['esquema'] = perfil['esquema'].fillna('')
+    perfil = pd.concat([particiones[['periodo', 'carrera', 'semestre', 'ruta_relativa', 'firma']]
+                        .rename(columns={'ruta_relativa': 'ruta'}), perfil.astype({c: 'int64' for c in conteos})], axis=1)
+    perfil = clasificar(perfil, umbral_fuera_rango)
+
+    perfil.to_csv(ruta_perfil, index=False, encoding='utf-8')
+    return perfil
+
+
+def resumir_por_periodo(perfil):
+    """
+    Agrega el perfil por periodo: particiones, inválidas, con advertencia, filas y, por
+    columna de calificación, la tasa de nulos, centinelas y fuera de rango sobre las filas
+    de las particiones legibles.
+    """
+    legibles = perfil[perfil['error'].isna()]
+    conteos = [f"{col}_{medida}" for col in COLUMNAS_CALIFICACION for medida in MEDIDAS]
+    resumen = legibles.groupby('periodo')[['filas', *conteos]].sum()
+    for columna in conteos:
+        resumen[f"tasa_{columna}"] = (resumen[columna] / resumen['filas'].where(resumen['filas'] > 0)).round(4)
+    estados = pd.crosstab(perfil['periodo'], perfil['estado'])
+    resumen = resumen.drop(columns=conteos).join(estados.reindex(columns=['ok', 'advertencia', 'invalida'], fill_value=0), how='outer')
+    resumen.insert(0, 'particiones', perfil.groupby('periodo').size())
+    return resumen.fillna({'filas': 0}).reset_index()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Perfila la calidad de los CSV exportados y marca las particiones inválidas.")
+    parser.add_argument('--datos', default=r"D:/TesisDB/CSV's")
+    parser.add_argument('--salida', default=None, help="Perfil por partición (por defecto, perfil_calidad.csv dentro de --datos).")
+    parser.add_argument('--resumen', default='resumen_calidad_periodos.csv', help="Tasas por periodo y columna.")
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--bloque', type=int, default=100000)
+    parser.add_argument('--umbral-fuera-rango', type=float, default=0.05)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.datos):
+        print(f"❌ ERROR: El directorio especificado '{args.datos}' no existe.")
+    else:
+        perfil = construir_perfil(args.datos, args.salida, args.procesos, args.bloque, args.umbral_fuera_rango)
+        resumen = resumir_por_periodo(perfil)
+        resumen.to_csv(args.resumen, index=False, encoding='utf-8')
+        print(f"Perfil de {len(perfil)} particiones guardado en '{args.salida or os.path.join(args.datos, ARCHIVO_PERFIL)}'.")
+        print(perfil['estado'].value_counts().to_string())
+        problemas = perfil[perfil['estado'] != 'ok'].sort_values('estado', ascending=False, kind='stable')
+        if not problemas.empty:
+            print("\nParticiones con problemas:")
+            print(problemas[['ruta', 'estado', 'motivo']].head(20).to_string(index=False))
+        print(f"Resumen por periodo guardado en '{args.resumen}'.")
@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Sin ventanas: las figuras se escriben directamente a archivo
+import matplotlib.pyplot as plt
+import matplotlib.ticker as mticker
+
+from cuboPoblacion import consultar_poblacion
+from calendario import cargar_calendario
+
+# Cambiar este valor obliga a regenerar todas las figuras (por ejemplo, al modificar su estilo)
+VERSION_REPORTES = 1
+MANIFIESTO = 'manifiesto_reportes.json'
+
+
+# --- Figuras ---
+
+def figura_poblacion_semestre(df, ruta, titulo, period_order_name=None):
+    """Barras por periodo y carrera (plot_sem_population de estadisticas2.ipynb), en el orden de df si no se da period_order_name."""
+    plt.figure(figsize=(14, 7))
+    pivot_df = df.pivot_table(index='Periodo_Nombre', columns='Carrera_Nombre', values='Num_Estudiantes', fill_value=0)
+    if period_order_name is None:
+        period_order_name = df['Periodo_Nombre'].unique()
+    pivot_df = pivot_df.reindex([nombre for nombre in period_order_name if nombre in pivot_df.index])
+    pivot_df.plot(kind='bar', ax=plt.gca(), width=0.8)
+    plt.title(titulo, fontsize=16)
+    plt.xlabel("Período", fontsize=12)
+    plt.ylabel("Número de Estudiantes", fontsize=12)
+    plt.xticks(rotation=45, ha='right', fontsize=10)
+    plt.legend(title="Carrera", bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=100)
+    plt.close()
+
+
+def figura_distribucion_semestres(df, ruta, titulo):
+    """Total de estudiantes por semestre (plot_semestre_distribution de estadisticas2.ipynb)."""
+    plt.figure(figsize=(12, 6))
+    df.groupby('Semestre')['Num_Estudiantes'].sum().plot(kind='bar', color='skyblue')
+    plt.title(titulo, fontsize=16)
+    plt.xlabel("Semestre", fontsize=12)
+    plt.ylabel("Número Total de Estudiantes (acumulado)", fontsize=12)
+    plt.xticks(rotation=0, fontsize=10)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=100)
+    plt.close()
+
+
+def figura_retencion_generaciones(df, ruta, titulo):
+    """Curvas de retención por generación de una carrera (plot_retention_curves de estadisticas2.ipynb)."""
+    plt.figure(figsize=(14, 7))
+    pivot_df = df.pivot_table(index='Semestre', columns='Cohorte_Nombre', values='Retencion', sort=False)
+    pivot_df.plot(ax=plt.gca(), marker='o')
+    plt.gca().yaxis.set_major_formatter(mticker.PercentFormatter())
+    plt.title(titulo, fontsize=16)
+    plt.xlabel("Semestre", fontsize=12)
+    plt.ylabel("Alumnos de la generación que llegan al semestre (%)", fontsize=12)
+    plt.legend(title="Generación", bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=100)
+    plt.close()
+
+
+def figura_decimo_semestre(df, ruta, titulo):
+    """Alumnos de cada generación en 1er semestre vs. los que llegan a 10mo y la proporción."""
+    resumen = df.groupby('Cohorte_Nombre', sort=False)[['Alumnos_Cohorte', 'Alumnos_Alcanzan']].sum()
+    proporcion = resumen['Alumnos_Alcanzan'] / resumen['Alumnos_Cohorte'] * 100
+
+    plt.figure(figsize=(14, 7))
+    bar_width = 0.35
+    index = np.arange(len(resumen))
+    plt.bar(index - bar_width / 2, resumen['Alumnos_Cohorte'], bar_width, label='Estudiantes 1er Semestre', color='skyblue')
+    plt.bar(index + bar_width / 2, resumen['Alumnos_Alcanzan'], bar_width, label='Llegaron a 10mo Semestre', color='lightcoral')
+    plt.ylabel("Número de Estudiantes", fontsize=12)
+    plt.xlabel("Generación (Periodo de Inscripción)", fontsize=12)
+    plt.xticks(index, resumen.index, rotation=45, ha='right', fontsize=10)
+
+    ax2 = plt.gca().twinx()
+    ax2.plot(index, proporcion, color='green', marker='o', linestyle='-', linewidth=2, label='Proporción (10mo/1ro Semestre) %')
+    ax2.yaxis.set_major_formatter(mticker.PercentFormatter())
+    ax2.set_ylabel("Proporción (%)", color='green', fontsize=12)
+    ax2.tick_params(axis='y', labelcolor='green')
+
+    lines, labels = plt.gcf().axes[0].get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax2.legend(lines + lines2, labels + labels2, loc='upper left', bbox_to_anchor=(1.05, 1))
+    plt.title(titulo, fontsize=16)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=100)
+    plt.close()
+
+
+def figura_tasa_anomalias(df, ruta, titulo, period_map=None):
+    """Proporción de registros anómalos por periodo y carrera."""
+    period_map = period_map or {}
+    df = df.assign(Periodo_Nombre=df['periodo'].map(lambda p: period_map.get(p, f"Periodo {p}")))
+    pivot_df = df.pivot_table(index='Periodo_Nombre', columns='carrera', values='tasa_anomalia', sort=False) * 100
+
+    plt.figure(figsize=(14, 7))
+    pivot_df.plot(kind='bar', ax=plt.gca(), width=0.8)
+    plt.gca().yaxis.set_major_formatter(mticker.PercentFormatter())
+    plt.title(titulo, fontsize=16)
+    plt.xlabel("Período", fontsize=12)
+    plt.ylabel("Registros anómalos (%)", fontsize=12)
+    plt.xticks(rotation=45, ha='right', fontsize=10)
+    plt.legend(title="Carrera", bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=100)
+    plt.close()
+
+
+def tabla_pivote(df, ruta, index, columns, values, aggfunc='sum'):
+    """Tabla resumen en CSV (las mismas que imprimía estadisticas.ipynb)."""
+    df.pivot_table(index=index, columns=columns, values=values, aggfunc=aggfunc, fill_value=0, sort=False).to_csv(ruta, encoding='utf-8')
+
+
+# --- Plan del reporte ---
+
+def planear_reporte(period_order, period_order_name, cubo=None, curvas=None, tasas_anomalias=None):
+    """
+    Arma la lista de salidas del reporte a partir de los agregados disponibles.
+
+    Args:
+        period_order, period_order_name (list): Calendario del árbol de los agregados
+                                                (cargar_calendario(ruta_datos)); ordena y nombra los periodos.
+
+    Returns:
+        list de (archivo, función, DataFrame de entrada, parámetros)
+    """
+    plan = []
+    if cubo is not None:
+        primer = consultar_poblacion(cubo, semestre=1, tipo_periodo='A', period_order=period_order)
+        decimo = consultar_poblacion(cubo, semestre=10, tipo_periodo='B', period_order=period_order)
+        completo = consultar_poblacion(cubo, period_order=period_order)
+        plan += [
+            ('poblacion_primer_semestre.png', figura_poblacion_semestre, primer,
+             {'titulo': "Población en Primer Semestre por Carrera y Período (Solo Períodos 'A')", 'period_order_name': period_order_name}),
+            ('poblacion_decimo_semestre.png', figura_poblacion_semestre, decimo,
+             {'titulo': "Población en Décimo Semestre por Carrera y Período (Solo Períodos 'B')", 'period_order_name': period_order_name}),
+            ('distribucion_semestres.png', figura_distribucion_semestres, completo,
+             {'titulo': "Distribución Total de Estudiantes por Semestre (Todos los Períodos)"}),
+            ('resumen_primer_semestre.csv', tabla_pivote, primer,
+             {'index': 'Carrera_Nombre', 'columns': 'Periodo_Nombre', 'values': 'Num_Estudiantes'}),
+            ('resumen_decimo_semestre.csv', tabla_pivote, decimo,
+             {'index': 'Carrera_Nombre', 'columns': 'Periodo_Nombre', 'values': 'Num_Estudiantes'}),
+            ('resumen_periodo_carrera.csv', tabla_pivote, completo,
+             {'index': 'Periodo_Nombre', 'columns': 'Carrera_Nombre', 'values': 'Num_Estudiantes'}),
+            ('resumen_tipo_periodo.csv', tabla_pivote, completo,
+             {'index': 'Tipo_Periodo', 'columns': 'Carrera_Nombre', 'values': 'Num_Estudiantes'}),
+        ]
+
+    if curvas is not None:
+        decimo = curvas[curvas['Semestre'] == 10]
+        plan += [
+            ('retencion_decimo_semestre.png', figura_decimo_semestre, decimo,
+             {'titulo': "Generaciones: 1er Semestre vs. Llegada a 10mo Semestre"}),
+            ('resumen_retencion_decimo.csv', tabla_pivote, decimo,
+             {'index': 'Cohorte_Nombre', 'columns': 'Carrera_ID', 'values': 'Retencion', 'aggfunc': 'mean'}),
+        ]
+        for carrera_id, curvas_carrera in curvas.groupby('Carrera_ID'):
+            plan += [
+                (f'retencion_carrera_{carrera_id}.png', figura_retencion_generaciones, curvas_carrera,
+                 {'titulo': f"Retención por Generación - Carrera {carrera_id}"}),
+                (f'retencion_decimo_carrera_{carrera_id}.png', figura_decimo_semestre, curvas_carrera[curvas_carrera['Semestre'] == 10],
+                 {'titulo': f"Generaciones: 1er Semestre vs. Llegada a 10mo Semestre - Carrera {carrera_id}"}),
+            ]
+
+    if tasas_anomalias is not None:
+        period_map = dict(zip(period_order, period_order_name))
+        plan += [
+            ('anomalias_periodo_carrera.png', figura_tasa_anomalias, tasas_anomalias,
+             {'titulo': "Proporción de Registros Anómalos por Periodo y Carrera", 'period_map': period_map}),
+            ('resumen_anomalias.csv', tabla_pivote, tasas_anomalias,
+             {'index': 'periodo', 'columns': 'carrera', 'values': 'tasa_anomalia', 'aggfunc': 'mean'}),
+        ]
+    return plan
+
+
+def huella_salida(funcion, df, parametros):
+    """Huella de una salida: versión, función, parámetros y contenido del DataFrame de entrada."""
+    h = hashlib.sha256(f"{VERSION_REPORTES}|{funcion.__name__}|{json.dumps(parametros, sort_keys=True, default=str)}".encode())
+    h.update(','.join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _generar(funcion, df, ruta, parametros):
+    inicio = time.perf_counter()
+    funcion(df, ruta, **parametros)
+    return time.perf_counter() - inicio
+
+
+def generar_reporte(plan, carpeta_salida, procesos=None, forzar=False):
+    """
+    Genera las figuras y tablas del plan en paralelo, regenerando solo las salidas cuya
+    entrada cambió desde la última ejecución (según el manifiesto de la carpeta).
+
+    Returns:
+        dict: {'generadas': [...], 'sin_cambios': [...]}
+    """
+    os.makedirs(carpeta_salida, exist_ok=True)
+    ruta_manifiesto = os.path.join(carpeta_salida, MANIFIESTO)
+    manifiesto = {}
+    if os.path.exists(ruta_manifiesto) and not forzar:
+        with open(ruta_manifiesto, encoding='utf-8') as f:
+            manifiesto = json.load(f)
+
+    pendientes, sin_cambios, huellas = [], [], {}
+    for archivo, funcion, df, parametros in plan:
+        ruta = os.path.join(carpeta_salida, archivo)
+        huellas[archivo] = huella_salida(funcion, df, parametros)
+        if manifiesto.get(archivo) == huellas[archivo] and os.path.exists(ruta):
+            sin_cambios.append(archivo)
+        elif df.empty:
+            print(f"ADVERTENCIA: No hay datos para '{archivo}'. Omitiendo.")
+        else:
+            pendientes.append((archivo, funcion, df, ruta, parametros))
+
+    generadas = []
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            futuros = {archivo: executor.submit(_generar, funcion, df, ruta, parametros)
+                       for archivo, funcion, df, ruta, parametros in pendientes}
+            for archivo, futuro in futuros.items():
+                try:
+                    futuro.result()
+                    manifiesto[archivo] = huellas[archivo]
+                    generadas.append(archivo)
+                except Exception as e:
+                    print(f"ERROR: No se pudo generar '{archivo}': {e}")
+
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    return {'generadas': generadas, 'sin_cambios': sin_cambios}
+
+
+def reporte_desde_archivos(ruta_cubo, ruta_curvas, ruta_anomalias, carpeta_salida, procesos=None, forzar=False, ruta_datos=None):
+    """
+    Genera el reporte a partir de los CSV de agregados; los que no existen se omiten con una advertencia.
+    Los periodos se ordenan y nombran con el calendario de `ruta_datos` (cargar_calendario).
+    """
+    agregados = {}
+    for nombre, ruta in (('cubo', ruta_cubo), ('curvas', ruta_curvas), ('tasas_anomalias', ruta_anomalias)):
+        if os.path.exists(ruta):
+            agregados[nombre] = pd.read_csv(ruta)
+        else:
+            print(f"ADVERTENCIA: No se encontró '{ruta}'; se omiten sus figuras.")
+
+    inicio = time.perf_counter()
+    if ruta_datos is None:
+        print("ADVERTENCIA: Sin --datos se usa el calendario por defecto; los periodos que no estén en él se omiten del reporte.")
+    calendario = cargar_calendario(ruta_datos)
+    plan = planear_reporte(calendario.period_order, calendario.period_order_name, **agregados)
+    resultado = generar_reporte(plan, carpeta_salida, procesos, forzar)
+    print(f"Reporte en '{carpeta_salida}': {len(resultado['generadas'])} salidas generadas, "
+          f"{len(resultado['sin_cambios'])} sin cambios ({time.perf_counter() - inicio:.2f} s).")
+    return resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera sin interfaz gráfica las figuras y tablas del reporte a partir de agregados precalculados.")
+    parser.add_argument('--cubo', default='cubo_poblacion.csv', help="Salida de cuboPoblacion.py.")
+    parser.add_argument('--curvas', default='curvas_retencion.csv', help="Salida de cohortes.py.")
+    parser.add_argument('--anomalias', default='anomalias_tasas.csv', help="Tasas por periodo y carrera de anomaliasMaterias.py.")
+    parser.add_argument('--datos', default=None, help="Árbol de CSV cuyo 'calendario.csv' ordena y nombra los periodos.")
+    parser.add_argument('--salida', default='reportes')
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--forzar', action='store_true', help="Regenerar todas las salidas aunque sus entradas no hayan cambiado.")
+    args = parser.parse_args()
+
+    reporte_desde_archivos(args.cubo, args.curvas, args.anomalias, args.salida, args.procesos, args.forzar, args.datos)
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import argparse
+import unicodedata
+import pandas as pd
+import numpy as np
+
+RUTA_TAXONOMIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'taxonomias')
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9\s]")
+
+
+def normalize_text(text):
+    """
+    Quita acentos y convierte a minúsculas para normalizar el texto.
+    """
+    if pd.isna(text):
+        return ""
+    text = str(text).lower()
+    text = unicodedata.normalize('NFD', text)
+    text = text.encode('ascii', 'ignore').decode('utf-8')
+    return text
+
+
+def normalizar(texto):
+    """
+    Normalización de mapeoMateriasGPT4.py: minúsculas, sin acentos y solo letras,
+    números y espacios.
+    """
+    if not isinstance(texto, str):
+        return ""
+    return _NO_ALFANUMERICO.sub("", normalize_text(texto)).strip()
+
+
+class Taxonomia:
+    """
+    Taxonomía de materias cargada desde un archivo de configuración JSON.
+
+    Campos del archivo:
+        nombre: Identificador de la taxonomía.
+        archivo_salida: CSV (id_materia, categoria) que genera.
+        normalizacion: 'acentos' (normalize_text) o 'alfanumerica' (normalizar).
+        coincidencia: 'palabra' (palabras clave completas) o 'regex' (expresiones regulares).
+        categoria_vacia: Categoría para nombres vacíos (null para tratarlos como cualquier otro).
+        categoria_por_defecto: Categoría cuando ningún patrón coincide.
+        categorias: Lista ordenada de {categoria, patrones}; gana la primera que coincide.
+    """
+
+    def __init__(self, config):
+        self.nombre = config['nombre']
+        self.archivo_salida = config.get('archivo_salida', f"{self.nombre}.csv")
+        self.normalizacion = config.get('normalizacion', 'acentos')
+        self.categoria_vacia = config.get('categoria_vacia')
+        self.categoria_por_defecto = config['categoria_por_defecto']
+        if self.normalizacion not in ('acentos', 'alfanumerica'):
+            raise ValueError(f"Normalización desconocida en la taxonomía '{self.nombre}': {self.normalizacion}")
+
+        coincidencia = config.get('coincidencia', 'palabra')
+        self.patrones = []
+        for entrada in config['categorias']:
+            if coincidencia == 'palabra':
+                patron = r'\b(?:' + '|'.join(re.escape(p) for p in entrada['patrones']) + r')\b'
+            elif coincidencia == 'regex':
+                patron = '|'.join(entrada['patrones'])
+            else:
+                raise ValueError(f"Tipo de coincidencia desconocido en la taxonomía '{self.nombre}': {coincidencia}")
+            self.patrones.append((entrada['categoria'], re.compile(patron)))
+
+    @property
+    def categorias(self):
+        return [categoria for categoria, _ in self.patrones] + [self.categoria_por_defecto]
+
+    def clasificar(self, texto_normalizado):
+        """Clasifica un nombre ya normalizado con la normalización de esta taxonomía."""
+        if not texto_normalizado and self.categoria_vacia is not None:
+            return self.categoria_vacia
+        for categoria, patron in self.patrones:
+            if patron.search(texto_normalizado):
+                return categoria
+        return self.categoria_por_defecto
+
+
+def cargar_taxonomia(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return Taxonomia(json.load(f))
+
+
+def cargar_taxonomias(carpeta=RUTA_TAXONOMIAS):
+    """Carga y compila todas las taxonomías (*.json) de una carpeta, en orden alfabético."""
+    archivos = sorted(f for f in os.listdir(carpeta) if f.endswith('.json'))
+    if not archivos:
+        raise ValueError(f"No se encontraron taxonomías en '{carpeta}'.")
+    return [cargar_taxonomia(os.path.join(carpeta, archivo)) for archivo in archivos]
+
+
+def normalizar_unicos(nombres):
+    """
+    Normaliza una sola vez cada nombre distinto.
+
+    Returns:
+        (códigos de cada fila, {normalizacion: lista de nombres normalizados por nombre distinto})
+    """
+    codigos, unicos = pd.factorize(pd.Series(nombres), use_na_sentinel=False)
+    acentos = [normalize_text(nombre) for nombre in unicos]
+    # normalizar() equivale a limpiar la salida de normalize_text, así que se deriva de ella
+    alfanumerica = [
+        _NO_ALFANUMERICO.sub("", texto).strip() if isinstance(nombre, str) else ""
+        for nombre, texto in zip(unicos, acentos)
+    ]
+    return codigos, {'acentos': acentos, 'alfanumerica': alfanumerica}
+
+
+def clasificar_con_taxonomias(nombres, taxonomias):
+    """
+    Clasifica una serie de nombres de materia contra todas las taxonomías. Cada nombre
+    normalizado distinto se clasifica una sola vez por taxonomía, así que las variantes que
+    solo difieren en mayúsculas, acentos (o signos, en la normalización alfanumérica)
+    comparten la misma búsqueda de patrones.
+
+    Returns:
+        DataFrame con una columna por taxonomía (su nombre) y el mismo índice que `nombres`.
+    """
+    nombres = pd.Series(nombres)
+    codigos, normalizados = normalizar_unicos(nombres)
+    resultados = {}
+    for taxonomia in taxonomias:
+        codigos_clave, claves = pd.factorize(pd.Series(normalizados[taxonomia.normalizacion], dtype=object))
+        categorias = np.array([taxonomia.clasificar(clave) for clave in claves], dtype=object)
+        resultados[taxonomia.nombre] = categorias[codigos_clave][codigos]
+    return pd.DataFrame(resultados, index=nombres.index)
+
+
+def generar_mapeos(ruta_entrada, carpeta_salida='.', taxonomias=None):
+    """
+    Lee materias_sin_clasificacion.csv una sola vez, lo clasifica con todas las
+    taxonomías y escribe el CSV (id_materia, categoria) de cada una.
+
+    Returns:
+        dict: {nombre_taxonomia: DataFrame del mapeo escrito}
+    """
+    if taxonomias is None:
+        taxonomias = cargar_taxonomias()
+    df = pd.read_csv(ruta_entrada)
+    if 'materia' not in df.columns:
+        raise ValueError("El archivo CSV no contiene la columna 'materia'.")
+
+    clasificacion = clasificar_con_taxonomias(df['materia'], taxonomias)
+    mapeos = {}
+    for taxonomia in taxonomias:
+        mapeo = pd.DataFrame({'id_materia': df['id_materia'], 'categoria': clasificacion[taxonomia.nombre]})
+        mapeo = mapeo.drop_duplicates().reset_index(drop=True)
+        mapeo.to_csv(os.path.join(carpeta_salida, taxonomia.archivo_salida), index=False, encoding='utf-8')
+        mapeos[taxonomia.nombre] = mapeo
+    return mapeos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clasifica las materias con todas las taxonomías configuradas en una sola pasada.")
+    parser.add_argument('--entrada', default='./sql/materias_sin_clasificacion.csv')
+    parser.add_argument('--salida', default='.', help="Carpeta donde se escriben los mapeos.")
+    parser.add_argument('--taxonomias', default=RUTA_TAXONOMIAS, help="Carpeta con los archivos JSON de taxonomías.")
+    args = parser.parse_args()
+
+    try:
+        print(f"Cargando taxonomías desde: {args.taxonomias}")
+        taxonomias = cargar_taxonomias(args.taxonomias)
+        print(f"Clasificando '{args.entrada}' con {len(taxonomias)} taxonomía(s)...")
+        mapeos = generar_mapeos(args.entrada, args.salida, taxonomias)
+        for taxonomia in taxonomias:
+            mapeo = mapeos[taxonomia.nombre]
+            print("\n" + "=" * 50)
+            print(f"{taxonomia.nombre}: '{taxonomia.archivo_salida}' con {len(mapeo)} materias únicas")
+            print("=" * 50)
+            print(mapeo['categoria'].value_counts())
+    except FileNotFoundError as e:
+        print(f"ERROR: No se encontró el archivo: {e}")
+    except ValueError as ve:
+        print(f"ERROR: {ve}")
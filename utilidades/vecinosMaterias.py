@@ -0,0 +1,174 @@
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from taxonomias import RUTA_TAXONOMIAS, cargar_taxonomias, clasificar_con_taxonomias, normalizar_unicos
+
+
+def vectorizar_nombres(nombres_normalizados, ngram_range=(3, 4)):
+    """
+    Construye vectores TF-IDF de n-gramas de caracteres (normalizados L2), de modo que
+    el producto punto entre dos filas es su similitud coseno.
+    """
+    vectorizador = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range, sublinear_tf=True, dtype=np.float32)
+    return vectorizador.fit_transform(nombres_normalizados)
+
+
+# Bytes por par consulta-referencia al procesar un lote: el producto disperso (dato e índice,
+# que con n-gramas de caracteres llega a ser casi denso), su copia densa y la salida de argpartition
+BYTES_POR_PAR = 24
+MAX_HILOS = 4
+
+
+def vecinos_mas_cercanos(X_consulta, X_referencia, k=5, tam_lote=2048, hilos=None, memoria_mb=64):
+    """
+    Busca los k vecinos más cercanos (similitud coseno) de cada fila de X_consulta entre
+    las filas de X_referencia, con productos de matrices dispersas por lotes. Los lotes
+    se reparten entre hilos (scipy y numpy liberan el GIL en el producto y en la
+    selección de los k mejores).
+
+    El lote se reduce para que cada hilo use a lo más unos `memoria_mb` MB, ya que su
+    matriz de similitudes tiene tantas columnas como nombres de referencia.
+
+    Args:
+        tam_lote (int): Máximo de filas de consulta por lote.
+        hilos (int): Hilos (por defecto, uno por núcleo hasta MAX_HILOS).
+        memoria_mb (float): Memoria aproximada por hilo para la matriz de similitudes del lote.
+
+    Returns:
+        (indices [n x k], similitudes [n x k]) ordenados de mayor a menor similitud.
+    """
+    num_referencia = X_referencia.shape[0]
+    k = min(k, num_referencia)
+    tam_lote = max(1, min(tam_lote, int(memoria_mb * 2**20 // (BYTES_POR_PAR * max(num_referencia, 1)))))
+    X_referencia_t = X_referencia.T.tocsc()
+    indices = np.empty((X_consulta.shape[0], k), dtype=np.int64)
+    similitudes = np.empty((X_consulta.shape[0], k), dtype=np.float32)
+
+    def procesar_lote(inicio):
+        S = (X_consulta[inicio:inicio + tam_lote] @ X_referencia_t).toarray()
+        # Los k mayores quedan al final; así no se necesita la copia negada de S
+        mejores = np.argpartition(S, num_referencia - k, axis=1)[:, num_referencia - k:]
+        orden = np.argsort(-np.take_along_axis(S, mejores, axis=1), axis=1)
+        mejores = np.take_along_axis(mejores, orden, axis=1)
+        indices[inicio:inicio + len(S)] = mejores
+        similitudes[inicio:inicio + len(S)] = np.take_along_axis(S, mejores, axis=1)
+
+    if k == 0:
+        return indices, similitudes
+    with ThreadPoolExecutor(max_workers=hilos or min(os.cpu_count() or 1, MAX_HILOS)) as executor:
+        list(executor.map(procesar_lote, range(0, X_consulta.shape[0], tam_lote)))
+    return indices, similitudes
+
+
+def votar_categorias(indices, similitudes, categorias_referencia):
+    """
+    Asigna a cada consulta la categoría con mayor similitud acumulada entre sus vecinos.
+    La confianza es esa similitud acumulada dividida entre k (1.0 solo si los k vecinos
+    son idénticos a la consulta y todos tienen la misma categoría).
+
+    Returns:
+        (códigos de categoría ganadora, confianza)
+    """
+    if indices.shape[1] == 0:
+        return np.zeros(len(indices), dtype=np.int64), np.zeros(len(indices))
+    categorias_vecinos = categorias_referencia[indices]
+    votos = np.zeros((len(indices), categorias_referencia.max() + 1))
+    filas = np.repeat(np.arange(len(indices)), indices.shape[1])
+    np.add.at(votos, (filas, categorias_vecinos.ravel()), similitudes.ravel())
+    ganadora = votos.argmax(axis=1)
+    return ganadora, votos[np.arange(len(votos)), ganadora] / indices.shape[1]
+
+
+def sugerir_categorias(nombres, taxonomias, k=5, umbral=0.5, tam_lote=2048, hilos=None, memoria_mb=64):
+    """
+    Para cada taxonomía, sugiere una categoría a los nombres que quedaron en la categoría
+    por defecto ("Otra", "Especialidad / Otra") a partir de sus vecinos ya clasificados.
+
+    Args:
+        nombres (pd.Series): Nombres de materia (pueden repetirse).
+        taxonomias (list): Taxonomías cargadas con cargar_taxonomias.
+        k (int): Número de vecinos que votan.
+        umbral (float): Confianza mínima para aceptar la sugerencia.
+        hilos (int): Hilos para los productos por lotes (por defecto, uno por núcleo hasta MAX_HILOS).
+        memoria_mb (float): Memoria aproximada por hilo para las similitudes de cada lote.
+
+    Returns:
+        dict: {nombre_taxonomia: DataFrame por nombre distinto con 'materia', 'categoria',
+               'categoria_sugerida', 'confianza', 'materia_vecina' y 'aceptada'}
+    """
+    nombres = pd.Series(nombres).reset_index(drop=True)
+    codigos, normalizados = normalizar_unicos(nombres)
+    primeros = pd.Series(np.arange(len(codigos))).groupby(codigos).first().to_numpy()
+    unicos = nombres.iloc[primeros].reset_index(drop=True)
+    clasificacion = clasificar_con_taxonomias(unicos, taxonomias)
+    X = vectorizar_nombres(normalizados['alfanumerica'])
+
+    sugerencias = {}
+    for taxonomia in taxonomias:
+        categorias = clasificacion[taxonomia.nombre].to_numpy()
+        sin_clasificar = np.isin(categorias, [taxonomia.categoria_por_defecto, taxonomia.categoria_vacia])
+        vacios = np.array([not texto for texto in normalizados['alfanumerica']])
+        referencia = np.flatnonzero(~sin_clasificar & ~vacios)
+        consulta = np.flatnonzero(sin_clasificar & ~vacios)
+
+        resultado = pd.DataFrame({
+            'materia': unicos.iloc[consulta].to_numpy(),
+            'categoria': categorias[consulta],
+            'categoria_sugerida': categorias[consulta],
+            'confianza': 0.0,
+            'materia_vecina': None,
+            'aceptada': False,
+        })
+        if len(referencia) and len(consulta):
+            codigos_categoria, nombres_categoria = pd.factorize(categorias[referencia])
+            indices, similitudes = vecinos_mas_cercanos(X[consulta], X[referencia], k, tam_lote, hilos, memoria_mb)
+            ganadora, confianza = votar_categorias(indices, similitudes, codigos_categoria)
+            resultado['categoria_sugerida'] = nombres_categoria[ganadora]
+            resultado['confianza'] = confianza
+            resultado['materia_vecina'] = unicos.iloc[referencia[indices[:, 0]]].to_numpy()
+            resultado['aceptada'] = confianza >= umbral
+        sugerencias[taxonomia.nombre] = resultado
+    return sugerencias
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clasifica por vecinos más cercanos (TF-IDF de caracteres) las materias sin categoría.")
+    parser.add_argument('--entrada', default='./sql/materias_sin_clasificacion.csv')
+    parser.add_argument('--salida', default='.', help="Carpeta donde se escriben las sugerencias y los mapeos corregidos.")
+    parser.add_argument('--taxonomias', default=RUTA_TAXONOMIAS)
+    parser.add_argument('--vecinos', type=int, default=5)
+    parser.add_argument('--umbral', type=float, default=0.5, help="Confianza mínima (0-1) para aceptar una sugerencia.")
+    parser.add_argument('--hilos', type=int, default=None, help=f"Hilos para los productos por lotes (por defecto, hasta {MAX_HILOS}).")
+    parser.add_argument('--memoria-mb', type=float, default=64, help="Memoria aproximada por hilo para las similitudes de cada lote.")
+    args = parser.parse_args()
+
+    try:
+        df = pd.read_csv(args.entrada)
+        taxonomias = cargar_taxonomias(args.taxonomias)
+        inicio = time.perf_counter()
+        sugerencias = sugerir_categorias(df['materia'], taxonomias, args.vecinos, args.umbral,
+                                         hilos=args.hilos, memoria_mb=args.memoria_mb)
+        print(f"Sugerencias calculadas en {time.perf_counter() - inicio:.2f} s para {df['materia'].nunique()} nombres distintos.")
+
+        clasificacion = clasificar_con_taxonomias(df['materia'], taxonomias)
+        for taxonomia in taxonomias:
+            resultado = sugerencias[taxonomia.nombre]
+            base = os.path.splitext(taxonomia.archivo_salida)[0]
+            resultado.to_csv(os.path.join(args.salida, f"{base}_sugerencias_vecinos.csv"), index=False, encoding='utf-8')
+
+            aceptadas = resultado[resultado['aceptada']].set_index('materia')['categoria_sugerida']
+            categorias = clasificacion[taxonomia.nombre].where(~df['materia'].isin(aceptadas.index), df['materia'].map(aceptadas))
+            mapeo = pd.DataFrame({'id_materia': df['id_materia'], 'categoria': categorias}).drop_duplicates().reset_index(drop=True)
+            mapeo.to_csv(os.path.join(args.salida, f"{base}_vecinos.csv"), index=False, encoding='utf-8')
+
+            print(f"\n{taxonomia.nombre}: {len(resultado)} nombres sin clasificar, {len(aceptadas)} reclasificados con confianza >= {args.umbral}.")
+            print(resultado.loc[resultado['aceptada'], 'categoria_sugerida'].value_counts())
+    except FileNotFoundError as e:
+        print(f"ERROR: No se encontró el archivo: {e}")
+    except ValueError as ve:
+        print(f"ERROR: {ve}")